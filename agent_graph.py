@@ -14,10 +14,13 @@ from nrql_nodes import (
 )
 
 
-def route_after_fetch_conditions(state: AgentState) -> Literal["fetch_condition_details", "end"]:
+def route_after_fetch_conditions(state: AgentState) -> Literal["fetch_condition_details", "send_notification", "end"]:
     """Route after fetching frequent conditions."""
     if state.get("frequent_conditions"):
         return "fetch_condition_details"
+    # Nothing to analyze (or the query failed) - still notify if there is a summary
+    if state.get("incidents_summary"):
+        return "send_notification"
     return "end"
 
 
@@ -76,6 +79,7 @@ def create_agent_graph() -> StateGraph:
         route_after_fetch_conditions,
         {
             "fetch_condition_details": "fetch_condition_details",
+            "send_notification": "send_notification",
             "end": "end"
         }
     )
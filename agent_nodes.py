@@ -1,32 +1,38 @@
 """Agent node functions for the LangGraph workflow."""
 from typing import Dict, Any
-from langchain_ibm import WatsonxLLM
 from agent_state import AgentState
 from alert_poller import create_poller
 from slack_client import SlackClient
 from config import Config
+from http_transport import get_transport
+from nrql_cache import get_nrql_cache
+from llm_cache import get_llm_cache
 from condition_docs_mapping import get_condition_documentation, has_documentation
+from llm_registry import get_llm
+from section_parser import SectionParser
+from run_budget import BudgetExceeded, ensure_deadline, has_budget, run_within_budget, time_left
 
 
 # Initialize clients
 slack_client = SlackClient()
 
-# Initialize WatsonX LLM
-print("🤖 Initializing IBM WatsonX Granite for AI reasoning")
-llm = WatsonxLLM(
-    model_id="ibm/granite-3-8b-instruct",
-    url=Config.WATSONX_URL,
-    apikey=Config.WATSONX_APIKEY,
-    project_id=Config.WATSONX_PROJECT_ID,
-    params={
-        "decoding_method": "greedy",
-        "max_new_tokens": 1500,
-        "temperature": 0.7,
-        "top_k": 50,
-        "top_p": 1
-    }
-)
-print("✅ IBM WatsonX Granite 3 8B Instruct initialized successfully")
+# Sections of the incident summary response and the heading variants accepted for them
+INCIDENT_SUMMARY_SECTIONS = {
+    "SUMMARY": ["executive summary", "overview"],
+    "INFRASTRUCTURE": ["infrastructure analysis", "infrastructure insights"],
+    "APPLICATION": ["application analysis", "application insights"],
+    "PRIORITY ACTIONS": ["priority action", "actions", "recommended actions"]
+}
+
+# WatsonX model for incident reasoning (client created on first use)
+INCIDENT_LLM_MODEL_ID = "ibm/granite-3-8b-instruct"
+INCIDENT_LLM_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 1500,
+    "temperature": 0.7,
+    "top_k": 50,
+    "top_p": 1
+}
 
 
 def fetch_incidents_node(state: AgentState) -> AgentState:
@@ -36,11 +42,12 @@ def fetch_incidents_node(state: AgentState) -> AgentState:
     print("🔍 Fetching open incidents from New Relic...")
 
     state["current_step"] = "fetch_incidents"
+    ensure_deadline(state)
 
     try:
         # Create poller and get incidents
         poller = create_poller()
-        incidents = poller.get_open_incidents()
+        incidents = run_within_budget(state, poller.get_open_incidents)
 
         state["open_incidents"] = incidents
         state["incident_count"] = len(incidents)
@@ -55,6 +62,14 @@ def fetch_incidents_node(state: AgentState) -> AgentState:
             state["key_insights"] = ["All systems operational"]
             state["next_step"] = "send_notification"
 
+    except BudgetExceeded as e:
+        error_msg = f"Failed to fetch incidents: {str(e)}"
+        print(f"❌ {error_msg}")
+        state["errors"].append(error_msg)
+        state["incidents_summary"] = "Open incidents could not be fetched within the time-to-notify budget."
+        state["key_insights"] = ["Manual review required", "Check New Relic dashboard for details"]
+        state["next_step"] = "send_notification"
+
     except Exception as e:
         error_msg = f"Failed to fetch incidents: {str(e)}"
         print(f"❌ {error_msg}")
@@ -64,6 +79,14 @@ def fetch_incidents_node(state: AgentState) -> AgentState:
     return state
 
 
+def _stream_into(parser: SectionParser, prompt: str):
+    """Feed the incident summary generation into the section parser."""
+    for chunk in get_llm(INCIDENT_LLM_MODEL_ID, INCIDENT_LLM_PARAMS).stream(prompt):
+        if parser.stopped:
+            break  # the run budget ran out and the caller moved on
+        parser.feed(chunk if isinstance(chunk, str) else str(chunk))
+
+
 def summarize_incidents_node(state: AgentState) -> AgentState:
     """
     Node to summarize incidents using WatsonX AI.
@@ -188,46 +211,32 @@ PRIORITY ACTIONS:
 - [critical action 3]
 """
 
-        # Invoke WatsonX LLM
-        print("🧠 Generating AI analysis...")
-        response = llm.invoke(prompt)
-
-        # Extract content from WatsonX response
-        content = response if isinstance(response, str) else str(response)
-
-        # Parse response sections
-        summary = ""
-        infrastructure_insights = []
-        application_insights = []
-        priority_actions = []
-
-        if "SUMMARY:" in content:
-            parts = content.split("INFRASTRUCTURE:")
-            summary = parts[0].replace("SUMMARY:", "").strip()
-
-            if len(parts) > 1:
-                infra_part = parts[1].split("APPLICATION:")[0].strip()
-                infrastructure_insights = [
-                    line.strip().lstrip("-•*").strip()
-                    for line in infra_part.split("\n")
-                    if line.strip() and line.strip()[0] in ["-", "•", "*"]
-                ]
+        # Stream the WatsonX response through the section parser; each
+        # section is available as soon as the next heading arrives. Sections
+        # that did not arrive within the run budget get the fallbacks below.
+        sections = {}
+        if has_budget(state, Config.BUDGET_MIN_LLM_SECONDS):
+            print("🧠 Generating AI analysis...")
+            parser = SectionParser(
+                INCIDENT_SUMMARY_SECTIONS,
+                on_section=lambda section: print(f"   ✓ {section['name']} section received")
+            )
+            try:
+                run_within_budget(state, _stream_into, parser, prompt)
+                sections = parser.close()
+            except BudgetExceeded as e:
+                print(f"⏱️  {str(e)} - using the sections received so far")
+                state["errors"].append(f"Incident summary cut short: {str(e)}")
+                # The stream keeps running on its worker thread; stop it
+                # feeding the parser and work on a copy from here on
+                sections = parser.stop()
+        else:
+            print(f"⏱️  {max(0, time_left(state)):.0f}s of run budget left - skipping AI analysis")
 
-                if "APPLICATION:" in parts[1]:
-                    app_part = parts[1].split("APPLICATION:")[1].split("PRIORITY ACTIONS:")[0].strip()
-                    application_insights = [
-                        line.strip().lstrip("-•*").strip()
-                        for line in app_part.split("\n")
-                        if line.strip() and line.strip()[0] in ["-", "•", "*"]
-                    ]
-
-                if "PRIORITY ACTIONS:" in content:
-                    actions_part = content.split("PRIORITY ACTIONS:")[1].strip()
-                    priority_actions = [
-                        line.strip().lstrip("-•*").strip()
-                        for line in actions_part.split("\n")
-                        if line.strip() and line.strip()[0] in ["-", "•", "*"]
-                    ]
+        summary = sections.get("SUMMARY", {}).get("text", "")
+        infrastructure_insights = sections.get("INFRASTRUCTURE", {}).get("items", [])
+        application_insights = sections.get("APPLICATION", {}).get("items", [])
+        priority_actions = sections.get("PRIORITY ACTIONS", {}).get("items", [])
 
         # Fallback if parsing failed
         if not summary:
@@ -391,14 +400,19 @@ def send_notification_node(state: AgentState) -> AgentState:
                 affected_users = details.get('affected_users', [])
                 total_users = details.get('total_affected_users', 0)
                 companies_count = details.get('affected_companies_count', 0)
+                top_companies = details.get('top_companies', [])
 
                 # Add summary of affected users
                 impact_text = (
                     f"👥 *Impact Analysis:*\n"
                     f"• Total Affected Users: `{total_users}`\n"
                     f"• Affected Companies: `{companies_count}`\n"
-                    f"• Top Affected Users (by error count):"
                 )
+                if top_companies:
+                    impact_text += "• Most Affected Companies: " + ", ".join(
+                        f"`{company['company_id']}` ({company['error_count']})" for company in top_companies
+                    ) + "\n"
+                impact_text += "• Top Affected Users (by error count):"
 
                 slack_blocks.append({
                     "type": "section",
@@ -593,6 +607,25 @@ def end_node(state: AgentState) -> AgentState:
     print(f"Incidents Processed: {state.get('incident_count', 0)}")
     print(f"Slack Sent: {'✅' if state.get('slack_sent') else '❌'}")
 
+    if state.get("deadline"):
+        remaining = time_left(state) + Config.NOTIFY_RESERVE_SECONDS
+        used = Config.TIME_TO_NOTIFY_SLO_SECONDS - remaining
+        status = "within" if remaining >= 0 else "OVER"
+        print(f"⏱️  Run budget: {used:.0f}s of {Config.TIME_TO_NOTIFY_SLO_SECONDS:.0f}s used ({status} the time-to-notify SLO)")
+
+    for host, stats in get_transport().stats().items():
+        print(f"🔌 {host}: {stats['requests']} requests over {stats['connections']} connections ({stats['reused']} reused)")
+
+    nrql_cache = get_nrql_cache()
+    if nrql_cache is not None:
+        metrics = nrql_cache.metrics()
+        print(f"🗄️  NRQL cache: {metrics['memory_hits']} memory / {metrics['disk_hits']} disk hits, {metrics['misses']} misses (hit rate {metrics['hit_rate']:.0%})")
+
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        metrics = llm_cache.metrics()
+        print(f"🗄️  LLM cache: {metrics['memory_hits']} memory / {metrics['disk_hits']} disk hits, {metrics['misses']} misses (hit rate {metrics['hit_rate']:.0%})")
+
     if state.get("errors"):
         print(f"\n⚠️  Errors encountered: {len(state['errors'])}")
         for error in state["errors"]:
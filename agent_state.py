@@ -9,6 +9,10 @@ class AgentState(TypedDict):
     open_incidents: Optional[List[Dict[str, Any]]]
     incident_count: int
 
+    # Incident that triggered this run (polling server), with its
+    # ALERT_QUERY time-series analysis under "timeseries"
+    trigger_incident: Optional[Dict[str, Any]]
+
     # NRQL-based frequent condition analysis
     frequent_conditions: Optional[List[Dict[str, Any]]]
     condition_details: Optional[Dict[str, Dict[str, Any]]]
@@ -23,6 +27,9 @@ class AgentState(TypedDict):
     # Error handling
     errors: List[str]
 
+    # Run deadline in epoch seconds (see run_budget)
+    deadline: Optional[float]
+
     # Agent control
     current_step: str
     next_step: Optional[str]
@@ -2,11 +2,22 @@
 Polling-based alert monitor that queries New Relic API for open incidents.
 This approach doesn't require webhooks - perfect for local development!
 """
+import os
+import json
 import time
+import threading
 import requests
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
 from config import Config
+from http_transport import get_transport
+from json_stream import GraphQLStream
+from seen_store import create_seen_store
+from poll_scheduler import create_poll_scheduler
+
+
+# Path of the issues connection in the aiIssues response
+ISSUES_PATH = "data.actor.account.aiIssues.issues"
 
 
 class NewRelicAlertPoller:
@@ -23,22 +34,61 @@ class NewRelicAlertPoller:
             "API-Key": self.api_key,
             "Content-Type": "application/json"
         }
-        self.processed_incidents = set()  # Track already processed incidents
-
-    def get_open_incidents(self) -> List[Dict[str, Any]]:
+        self.processed_incidents = create_seen_store()  # Track already processed incidents
+        self._claim_lock = threading.Lock()
+        # Reported but not yet claimed (mark_processed=False), and dropped by the
+        # consumer before being claimed (re-offered by the next poll)
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._dropped: Dict[Any, Dict[str, Any]] = {}
+
+        # Incremental polling: high-water mark over issue updatedAt/createdAt (epoch ms)
+        self.incremental = Config.POLL_INCREMENTAL
+        self.full_resync_cycles = Config.POLL_FULL_RESYNC_CYCLES
+        self.watermark_overlap_ms = Config.POLL_WATERMARK_OVERLAP_SECONDS * 1000
+        self.state_file = os.path.join(Config.STATE_DIR, "poller_state.json")
+        self.watermark = self._load_watermark()
+        self.cycles_since_resync = 0
+
+        # Whether the last iter_open_incidents walk reached the final page, and
+        # whether it stopped at the POLL_MAX_PAGES cap instead
+        self.last_walk_complete = False
+        self.last_walk_capped = False
+
+    def iter_open_incidents(
+        self,
+        max_pages: Optional[int] = None,
+        limit: Optional[int] = None,
+        since_ms: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Query New Relic NerdGraph API for currently open incidents.
-        Uses the aiIssues query with correct structure.
+        Stream currently open incidents from the NerdGraph aiIssues API.
 
-        Returns:
-            List of open incidents
+        Follows ``nextCursor`` so issues beyond the first page are not dropped,
+        and yields normalized incidents page by page. Pages are only requested
+        while the caller keeps consuming, so breaking out of the loop (or
+        passing ``limit``) stops further API calls. ``last_walk_complete`` is
+        True afterwards only if every page was fetched (no request failure,
+        GraphQL error, page cap or ``limit`` cut the walk short);
+        ``last_walk_capped`` tells whether the page cap did.
+
+        Args:
+            max_pages: Maximum number of pages to request (default: Config.POLL_MAX_PAGES)
+            limit: Stop after yielding this many incidents (default: no limit)
+            since_ms: Only return issues created or updated at/after this epoch
+                millisecond timestamp (default: all open issues). This filter is
+                applied client-side: NerdGraph's ``timeWindow`` selects issues
+                whose lifetime overlaps the window, which every open issue
+                does, so the same pages are downloaded either way.
+
+        Yields:
+            Normalized open incidents
         """
         query = """
-        query($accountId: Int!) {
+        query($accountId: Int!, $cursor: String, $timeWindow: TimeWindowInput) {
           actor {
             account(id: $accountId) {
               aiIssues {
-                issues(filter: {states: [CREATED, ACTIVATED]}) {
+                issues(cursor: $cursor, timeWindow: $timeWindow, filter: {states: [CREATED, ACTIVATED]}) {
                   issues {
                     issueId
                     title
@@ -49,6 +99,7 @@ class NewRelicAlertPoller:
                     closedAt
                     sources
                   }
+                  nextCursor
                 }
               }
             }
@@ -56,92 +107,296 @@ class NewRelicAlertPoller:
         }
         """
 
-        variables = {
-            "accountId": int(self.account_id)
-        }
+        if max_pages is None:
+            max_pages = Config.POLL_MAX_PAGES
+
+        self.last_walk_complete = False
+        self.last_walk_capped = False
+        cursor = None
+        pages = 0
+        yielded = 0
+
+        while max_pages <= 0 or pages < max_pages:
+            variables = {
+                "accountId": int(self.account_id),
+                "cursor": cursor
+            }
+            if since_ms is not None:
+                variables["timeWindow"] = {
+                    "startTime": int(since_ms),
+                    "endTime": int(time.time() * 1000)
+                }
+
+            payload = {
+                "query": query,
+                "variables": variables
+            }
+
+            response = None
+            try:
+                response = get_transport().post(
+                    self.graphql_endpoint,
+                    json_body=payload,
+                    headers=self.headers,
+                    stream=True
+                )
+                response.raise_for_status()
+
+            except requests.exceptions.RequestException as e:
+                # Release the streamed connection back to the pool
+                if response is not None:
+                    response.close()
+                print(f"❌ Failed to query incidents: {str(e)}")
+                return
+
+            pages += 1
+
+            # Issues are decoded one at a time as the page streams in
+            page = GraphQLStream(response, ISSUES_PATH + ".issues", capture=(ISSUES_PATH + ".nextCursor",))
+            for issue in page:
+                try:
+                    incident = self._normalize_issue(issue)
+                except Exception as e:
+                    print(f"⚠️  Error parsing issue: {str(e)}")
+                    continue
+
+                # timeWindow matches every issue still open during the window,
+                # so it does not shrink the payload; select changed issues here
+                if since_ms is not None and self._issue_timestamp(incident) < since_ms:
+                    continue
+
+                yield incident
+                yielded += 1
+
+                if limit is not None and yielded >= limit:
+                    page.close()
+                    return
+
+            if page.errors:
+                print(f"⚠️  GraphQL errors: {page.errors}")
+                return
+
+            cursor = page.captured.get(ISSUES_PATH + ".nextCursor")
+            if not cursor:
+                self.last_walk_complete = True
+                return
+
+        self.last_walk_capped = True
+        print(f"⚠️  Stopped after {pages} pages of open issues (page cap reached)")
+
+    def get_open_incidents(self, max_pages: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Query New Relic NerdGraph API for currently open incidents.
+        Uses the aiIssues query with correct structure.
+
+        Args:
+            max_pages: Maximum number of pages to request (default: Config.POLL_MAX_PAGES)
+            limit: Maximum number of incidents to return (default: no limit)
+
+        Returns:
+            List of open incidents
+        """
+        incidents = list(self.iter_open_incidents(max_pages=max_pages, limit=limit))
+
+        print(f"📊 Found {len(incidents)} open issues in New Relic")
+
+        return incidents
+
+    @staticmethod
+    def _normalize_issue(issue: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a raw aiIssues issue into the incident format used by the agent.
 
-        payload = {
-            "query": query,
-            "variables": variables
+        Args:
+            issue: Raw issue from NerdGraph
+
+        Returns:
+            Normalized incident
+        """
+        # Extract sources to get condition and policy names
+        sources = issue.get("sources", [])
+        condition_name = ""
+        policy_name = ""
+
+        if sources and len(sources) > 0:
+            first_source = sources[0]
+            # Check if source is a dict (object) or string
+            if isinstance(first_source, dict):
+                condition_name = first_source.get("title", "")
+            elif isinstance(first_source, str):
+                # If it's a string, use it directly
+                condition_name = first_source
+
+        return {
+            "incidentId": issue.get("issueId"),
+            "title": issue.get("title"),
+            "priority": issue.get("priority"),
+            "state": "OPEN",
+            "openedAt": issue.get("createdAt"),
+            "updatedAt": issue.get("updatedAt"),
+            "closedAt": issue.get("closedAt"),
+            "conditionName": condition_name or issue.get("title", ""),
+            "policyName": policy_name
         }
 
+    @staticmethod
+    def _issue_timestamp(incident: Dict[str, Any]) -> int:
+        """
+        Get the most recent change time of an incident in epoch milliseconds.
+
+        Args:
+            incident: Normalized incident
+
+        Returns:
+            max(updatedAt, openedAt), or 0 if neither can be parsed
+        """
+        latest = 0
+        for value in (incident.get("updatedAt"), incident.get("openedAt")):
+            if value is None:
+                continue
+            try:
+                if isinstance(value, (int, float)) or str(value).isdigit():
+                    millis = int(value)
+                else:
+                    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+                    millis = int(parsed.timestamp() * 1000)
+            except (TypeError, ValueError):
+                continue
+            latest = max(latest, millis)
+        return latest
+
+    def _load_watermark(self) -> Optional[int]:
+        """Load the persisted incremental-poll watermark, if any."""
+        if not self.incremental:
+            return None
         try:
-            response = requests.post(
-                self.graphql_endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
-            response.raise_for_status()
+            with open(self.state_file, "r") as f:
+                return json.load(f).get("watermark")
+        except (OSError, ValueError):
+            return None
 
-            data = response.json()
+    def _save_watermark(self):
+        """Persist the incremental-poll watermark so restarts resume from it."""
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump({"watermark": self.watermark}, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            print(f"⚠️  Failed to persist poll watermark: {str(e)}")
+
+    def claim_incident(self, incident_id: Any) -> bool:
+        """
+        Mark an incident as processed unless that already happened.
 
-            if "errors" in data:
-                print(f"⚠️  GraphQL errors: {data['errors']}")
-                return []
+        Used by consumers that only mark incidents once they actually start
+        processing them (see ``mark_processed``), so an incident that is
+        reported again while still queued is claimed only once.
 
-            # Extract issues from the correct structure
-            issues_wrapper = data.get("data", {}).get("actor", {}).get("account", {}).get("aiIssues", {}).get("issues", {})
-            issues_list = issues_wrapper.get("issues", [])
+        Args:
+            incident_id: Incident ID
 
-            print(f"📊 Found {len(issues_list)} open issues in New Relic")
+        Returns:
+            True if the caller should process the incident
+        """
+        with self._claim_lock:
+            self._pending.pop(incident_id, None)
+            self._dropped.pop(incident_id, None)
+            if incident_id in self.processed_incidents:
+                return False
+            self.processed_incidents.add(incident_id)
+            return True
 
-            incidents = []
-            for issue in issues_list:
-                try:
-                    # Extract sources to get condition and policy names
-                    sources = issue.get("sources", [])
-                    condition_name = ""
-                    policy_name = ""
-
-                    if sources and len(sources) > 0:
-                        first_source = sources[0]
-                        # Check if source is a dict (object) or string
-                        if isinstance(first_source, dict):
-                            condition_name = first_source.get("title", "")
-                        elif isinstance(first_source, str):
-                            # If it's a string, use it directly
-                            condition_name = first_source
-
-                    incidents.append({
-                        "incidentId": issue.get("issueId"),
-                        "title": issue.get("title"),
-                        "priority": issue.get("priority"),
-                        "state": "OPEN",
-                        "openedAt": issue.get("createdAt"),
-                        "closedAt": issue.get("closedAt"),
-                        "conditionName": condition_name or issue.get("title", ""),
-                        "policyName": policy_name
-                    })
-                except Exception as e:
-                    print(f"⚠️  Error parsing issue: {str(e)}")
-                    continue
+    def release_incident(self, incident: Dict[str, Any]):
+        """
+        Hand back a reported incident the consumer could not queue.
+
+        The incident is re-offered by the next poll_continuously cycle, since
+        the watermark may already have moved past it.
 
-            return incidents
+        Args:
+            incident: Incident that was dropped before being claimed
+        """
+        incident_id = incident.get("incidentId")
+        with self._claim_lock:
+            self._pending.pop(incident_id, None)
+            if incident_id not in self.processed_incidents:
+                self._dropped[incident_id] = incident
 
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Failed to query incidents: {str(e)}")
-            return []
+    def take_dropped_incidents(self) -> List[Dict[str, Any]]:
+        """
+        Take the released incidents for re-offering (they count as reported again).
 
-    def check_for_matching_incidents(self, condition_name_pattern: Optional[str] = None) -> List[Dict[str, Any]]:
+        Returns:
+            Dropped incidents, oldest drop first
+        """
+        with self._claim_lock:
+            incidents = list(self._dropped.values())
+            self._dropped.clear()
+            for incident in incidents:
+                self._pending[incident.get("incidentId")] = incident
+        return incidents
+
+    def _is_reported(self, incident_id: Any) -> bool:
+        """Whether an incident was reported and is still waiting to be claimed."""
+        with self._claim_lock:
+            return incident_id in self._pending or incident_id in self._dropped
+
+    def check_for_matching_incidents(
+        self,
+        condition_name_pattern: Optional[str] = None,
+        mark_processed: bool = True
+    ) -> List[Dict[str, Any]]:
         """
         Check for open incidents that match criteria.
 
+        In incremental mode only issues changed since the stored watermark are
+        processed (aiIssues has no server-side updatedAt filter, so every open
+        issue is still downloaded; only the set run through the filters and
+        the seen store shrinks); every ``POLL_FULL_RESYNC_CYCLES`` cycles (and whenever no
+        watermark has been persisted yet) all open issues are fetched again to
+        correct any drift. The watermark only advances after a walk that
+        fetched every page, so issues on pages that were never fetched are
+        picked up by the next cycle instead of falling behind it. The one
+        exception is a first walk that hits POLL_MAX_PAGES (an alert storm
+        with more open issues than the cap): polling then goes incremental
+        from the start of that walk rather than repeating a capped full walk
+        forever, and issues beyond the cap surface once they change again or
+        at a full resync that fits within the cap.
+
         Args:
             condition_name_pattern: Optional pattern to match in condition name
+            mark_processed: Mark returned incidents as processed right away.
+                Pass False when a queue sits between polling and processing
+                and the consumer claims each incident with ``claim_incident``.
+                Incidents reported earlier and not claimed yet are then not
+                reported again; ones the consumer drops are handed back with
+                ``release_incident`` and re-offered by poll_continuously.
 
         Returns:
             List of matching incidents that haven't been processed yet
         """
-        all_incidents = self.get_open_incidents()
-
+        since_ms = None
+        if self.incremental and self.watermark is not None \
+                and self.cycles_since_resync < self.full_resync_cycles:
+            since_ms = max(0, self.watermark - self.watermark_overlap_ms)
+            self.cycles_since_resync += 1
+        else:
+            self.cycles_since_resync = 0
+
+        cycle_started_ms = int(time.time() * 1000)
         new_incidents = []
-        for incident in all_incidents:
+        latest_seen = self.watermark or 0
+        for incident in self.iter_open_incidents(since_ms=since_ms):
             incident_id = incident.get("incidentId")
+            latest_seen = max(latest_seen, self._issue_timestamp(incident))
 
-            # Skip if already processed
+            # Skip if already processed (or reported and still waiting for a worker)
             if incident_id in self.processed_incidents:
                 continue
+            if not mark_processed and self._is_reported(incident_id):
+                continue
 
             # Filter by condition name if specified
             if condition_name_pattern:
@@ -160,7 +415,28 @@ class NewRelicAlertPoller:
                     continue
 
             new_incidents.append(incident)
-            self.processed_incidents.add(incident_id)
+            if mark_processed:
+                self.processed_incidents.add(incident_id)
+            else:
+                with self._claim_lock:
+                    self._pending[incident_id] = incident
+
+        if self.last_walk_capped:
+            print(f"🚨 More open issues than POLL_MAX_PAGES={Config.POLL_MAX_PAGES} pages - "
+                  f"issues beyond the cap were not checked; raise POLL_MAX_PAGES to cover them")
+
+        if not self.last_walk_complete:
+            if self.incremental and self.watermark is None and self.last_walk_capped:
+                # Never getting a complete walk would keep polling full and capped
+                # forever; bound the watermark to this walk's start instead
+                print("⚠️  Starting incremental polling from this capped walk")
+                self.watermark = cycle_started_ms
+                self._save_watermark()
+            else:
+                print("⚠️  Incomplete poll of open issues - keeping the previous watermark")
+        elif self.incremental and latest_seen and latest_seen != self.watermark:
+            self.watermark = latest_seen
+            self._save_watermark()
 
         return new_incidents
 
@@ -210,20 +486,40 @@ class NewRelicAlertPoller:
             print(f"   State: {incident.get('state')}")
             print()
 
-    def poll_continuously(self, interval_seconds: int = 60, condition_pattern: Optional[str] = None, show_initial: bool = True):
+    def poll_continuously(
+        self,
+        interval_seconds: int = 60,
+        condition_pattern: Optional[str] = None,
+        show_initial: bool = True,
+        adaptive: Optional[bool] = None,
+        mark_processed: bool = True
+    ):
         """
         Continuously poll for new incidents.
 
+        Polls run on a fixed monotonic cadence, so time spent polling (or by
+        the consumer of this generator) does not stretch the period.
+
         Args:
             interval_seconds: How often to poll (default: 60 seconds)
             condition_pattern: Optional pattern to match in condition name
             show_initial: Whether to show initial open incidents on startup (default: True)
+            adaptive: Poll faster while incidents arrive and back off while quiet
+                (default: Config.POLL_ADAPTIVE)
+            mark_processed: See check_for_matching_incidents. When False,
+                incidents handed back with ``release_incident`` are yielded
+                again at the start of the next cycle; they are not logged or
+                counted as new activity for the adaptive interval.
         """
+        scheduler = create_poll_scheduler(interval_seconds, adaptive=adaptive)
+
         print("="*60)
         print("🔄 Starting New Relic Alert Poller")
         print("="*60)
         print(f"Account ID: {self.account_id}")
         print(f"Poll Interval: {interval_seconds} seconds")
+        if scheduler.adaptive:
+            print(f"Adaptive Interval: {scheduler.min_interval:g}-{scheduler.max_interval:g} seconds")
         if condition_pattern:
             print(f"Filter Pattern: {condition_pattern}")
         print()
@@ -240,10 +536,18 @@ class NewRelicAlertPoller:
                 print("👀 Now monitoring for NEW incidents...")
                 print(f"{'='*60}\n")
 
+            scheduler.start()
             while True:
+                new_incidents = []
                 try:
+                    # Re-offer incidents the consumer dropped (e.g. full work queue)
+                    if not mark_processed:
+                        for incident in self.take_dropped_incidents():
+                            print(f"🔁 Re-offering dropped incident {incident.get('incidentId')}")
+                            yield incident
+
                     # Check for new incidents
-                    new_incidents = self.check_for_matching_incidents(condition_pattern)
+                    new_incidents = self.check_for_matching_incidents(condition_pattern, mark_processed=mark_processed)
 
                     if new_incidents:
                         print(f"\n🔔 Found {len(new_incidents)} new incident(s)!")
@@ -270,8 +574,9 @@ class NewRelicAlertPoller:
                 except Exception as e:
                     print(f"\n⚠️  Error during poll: {str(e)}")
 
-                # Wait before next poll
-                time.sleep(interval_seconds)
+                # Wait for the next scheduled poll
+                scheduler.record(bool(new_incidents))
+                scheduler.wait()
 
         except KeyboardInterrupt:
             print("\n\n🛑 Polling stopped by user")
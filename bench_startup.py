@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Benchmark the cost of importing and building the agent graph.
+
+Each run starts a fresh interpreter, so module caches from earlier runs do
+not hide import-time work (client construction, network/auth setup).
+
+Usage:
+    python bench_startup.py            # 5 runs
+    python bench_startup.py --runs 10
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+PROBE = """
+import time
+start = time.perf_counter()
+import agent_graph
+imported = time.perf_counter()
+agent_graph.create_agent_graph()
+built = time.perf_counter()
+import llm_registry
+print(f"{imported - start:.6f} {built - imported:.6f} {len(llm_registry._clients)}")
+"""
+
+
+def run_once() -> tuple:
+    """Import agent_graph and build the graph in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    import_seconds, build_seconds, clients = result.stdout.strip().splitlines()[-1].split()
+    return float(import_seconds), float(build_seconds), int(clients)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure agent_graph import and build time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh-interpreter runs")
+    args = parser.parse_args()
+
+    print(f"⏱️  Measuring agent graph startup over {args.runs} runs...")
+    imports, builds = [], []
+    clients = 0
+    for _ in range(args.runs):
+        import_seconds, build_seconds, clients = run_once()
+        imports.append(import_seconds)
+        builds.append(build_seconds)
+
+    print(f"   import agent_graph:  median {statistics.median(imports) * 1000:.1f} ms, max {max(imports) * 1000:.1f} ms")
+    print(f"   create_agent_graph:  median {statistics.median(builds) * 1000:.1f} ms, max {max(builds) * 1000:.1f} ms")
+    print(f"   LLM clients created at startup: {clients}")
+
+
+if __name__ == "__main__":
+    main()
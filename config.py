@@ -19,18 +19,99 @@ class Config:
     else:
         GRAPHQL_ENDPOINT = "https://api.newrelic.com/graphql"
 
+    # Shared HTTP transport (keep-alive pools for NerdGraph and Slack)
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+    HTTP_GZIP_REQUESTS = os.getenv("HTTP_GZIP_REQUESTS", "false").lower() == "true"
+
+    # NRQL execution
+    # Maximum NRQL queries packed into one aliased NerdGraph request
+    NRQL_BATCH_SIZE = int(os.getenv("NRQL_BATCH_SIZE", "10"))
+    # Concurrent NRQL engine: thread pool size, NerdGraph requests in flight and per second
+    NRQL_MAX_WORKERS = int(os.getenv("NRQL_MAX_WORKERS", "8"))
+    NRQL_MAX_CONCURRENCY = int(os.getenv("NRQL_MAX_CONCURRENCY", "5"))
+    NRQL_RATE_PER_SECOND = float(os.getenv("NRQL_RATE_PER_SECOND", "10"))
+    NRQL_MAX_RETRIES = int(os.getenv("NRQL_MAX_RETRIES", "3"))
+    # Identical NRQL submitted within this window reuses the earlier result (prefetch)
+    NRQL_SHARE_SECONDS = float(os.getenv("NRQL_SHARE_SECONDS", "60"))
+    # Opt-in async NRQL for long FACET queries: submit with async=true, then poll progress
+    NRQL_ASYNC_ENABLED = os.getenv("NRQL_ASYNC_ENABLED", "false").lower() == "true"
+    # Seconds NerdGraph waits synchronously before handing back a queryId to poll
+    NRQL_ASYNC_SUBMIT_TIMEOUT_SECONDS = float(os.getenv("NRQL_ASYNC_SUBMIT_TIMEOUT_SECONDS", "10"))
+    # Stop polling after this long and return partial results
+    NRQL_ASYNC_DEADLINE_SECONDS = float(os.getenv("NRQL_ASYNC_DEADLINE_SECONDS", "300"))
+    # FACET results that hit their LIMIT are re-run over halved time ranges, up to this many times
+    NRQL_SPLIT_MAX_DEPTH = int(os.getenv("NRQL_SPLIT_MAX_DEPTH", "5"))
+
+    # NRQL result cache (memory LRU + SQLite under STATE_DIR), TTL per query class:
+    # absolute = fixed SINCE/UNTIL timestamps, relative = "... ago" windows, default = other
+    NRQL_CACHE_ENABLED = os.getenv("NRQL_CACHE_ENABLED", "true").lower() == "true"
+    NRQL_CACHE_DISK = os.getenv("NRQL_CACHE_DISK", "true").lower() == "true"
+    NRQL_CACHE_TTL_ABSOLUTE_SECONDS = float(os.getenv("NRQL_CACHE_TTL_ABSOLUTE_SECONDS", "3600"))
+    NRQL_CACHE_TTL_RELATIVE_SECONDS = float(os.getenv("NRQL_CACHE_TTL_RELATIVE_SECONDS", "300"))
+    NRQL_CACHE_TTL_DEFAULT_SECONDS = float(os.getenv("NRQL_CACHE_TTL_DEFAULT_SECONDS", "60"))
+    NRQL_CACHE_MEMORY_MB = int(os.getenv("NRQL_CACHE_MEMORY_MB", "32"))
+    NRQL_CACHE_DISK_MB = int(os.getenv("NRQL_CACHE_DISK_MB", "256"))
+
+    # Incremental 7-day rollups: hourly buckets stored under STATE_DIR, only new hours queried
+    ROLLUPS_ENABLED = os.getenv("ROLLUPS_ENABLED", "true").lower() == "true"
+    ROLLUP_WINDOW_HOURS = int(os.getenv("ROLLUP_WINDOW_HOURS", "168"))
+    # Hours re-fetched before the last stored bucket to pick up late-arriving data
+    ROLLUP_OVERLAP_HOURS = int(os.getenv("ROLLUP_OVERLAP_HOURS", "2"))
+
     # Slack Configuration
     SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
     OPSGENIE_SLACK_EMAIL = os.getenv(
         "OPSGENIE_SLACK_EMAIL",
         "opsgenie-jv-aaaapspxg6qkfwmd4rye7f46na@grid-employinc.org.slack.com"
     )
+    SLACK_TIMEOUT_SECONDS = float(os.getenv("SLACK_TIMEOUT_SECONDS", "10"))
 
     # IBM WatsonX Configuration (REQUIRED)
     WATSONX_APIKEY = os.getenv("WATSONX_APIKEY") or os.getenv("WATSONX_API_KEY")
     WATSONX_PROJECT_ID = os.getenv("WATSONX_PROJECT_ID") or os.getenv("WATSONX_PROJECTID")
     WATSONX_URL = os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com")
 
+    # Polling Configuration
+    # Maximum number of aiIssues pages fetched per poll (0 = follow every cursor)
+    POLL_MAX_PAGES = int(os.getenv("POLL_MAX_PAGES", "20"))
+    # Incremental polling: only process issues changed since the last seen updatedAt
+    # (every open issue is still downloaded - aiIssues cannot filter on updatedAt)
+    POLL_INCREMENTAL = os.getenv("POLL_INCREMENTAL", "true").lower() == "true"
+    # Re-download every open issue after this many incremental cycles
+    POLL_FULL_RESYNC_CYCLES = int(os.getenv("POLL_FULL_RESYNC_CYCLES", "30"))
+    # Re-scan this far behind the watermark to tolerate late updates / clock skew
+    POLL_WATERMARK_OVERLAP_SECONDS = int(os.getenv("POLL_WATERMARK_OVERLAP_SECONDS", "120"))
+    # Adaptive cadence: drop to the min interval while incidents arrive, back off when quiet
+    POLL_ADAPTIVE = os.getenv("POLL_ADAPTIVE", "false").lower() == "true"
+    POLL_MIN_INTERVAL_SECONDS = float(os.getenv("POLL_MIN_INTERVAL_SECONDS", "15"))
+    POLL_MAX_INTERVAL_SECONDS = float(os.getenv("POLL_MAX_INTERVAL_SECONDS", "300"))
+    POLL_BACKOFF_FACTOR = float(os.getenv("POLL_BACKOFF_FACTOR", "2.0"))
+    # Random wake-up offset as a fraction of the interval (keeps pollers from synchronizing)
+    POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))
+
+    # Local state (poll watermark, caches) lives here
+    STATE_DIR = os.getenv("AGENT_STATE_DIR", ".agent_state")
+
+    # Seen-incident store: "sqlite" (persistent, warm restarts) or "memory"
+    SEEN_STORE_BACKEND = os.getenv("SEEN_STORE_BACKEND", "sqlite").lower()
+    SEEN_STORE_TTL_SECONDS = int(os.getenv("SEEN_STORE_TTL_SECONDS", str(7 * 24 * 3600)))
+    SEEN_STORE_MAX_ENTRIES = int(os.getenv("SEEN_STORE_MAX_ENTRIES", "100000"))
+    SEEN_STORE_MEMORY_ENTRIES = int(os.getenv("SEEN_STORE_MEMORY_ENTRIES", "10000"))
+    SEEN_STORE_BLOOM = os.getenv("SEEN_STORE_BLOOM", "true").lower() == "true"
+
+    # Incident processing workers (polling server)
+    WORKER_COUNT = int(os.getenv("WORKER_COUNT", "2"))
+    WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", "100"))
+    # When the queue is full: drop_oldest, drop_newest or block (bounded wait)
+    WORKER_OVERFLOW_POLICY = os.getenv("WORKER_OVERFLOW_POLICY", "drop_oldest").lower()
+    WORKER_QUEUE_BLOCK_SECONDS = float(os.getenv("WORKER_QUEUE_BLOCK_SECONDS", "1.0"))
+    # "priority" (CRITICAL first, aged to avoid starvation) or "fifo"
+    WORKER_SCHEDULING = os.getenv("WORKER_SCHEDULING", "priority").lower()
+    # Queue wait worth one priority level when aging lower-priority incidents
+    WORKER_PRIORITY_AGING_SECONDS = float(os.getenv("WORKER_PRIORITY_AGING_SECONDS", "120"))
+
     # LLM Configuration - WatsonX ONLY
     USE_WATSONX = True  # Always use WatsonX
 
@@ -47,6 +128,40 @@ class Config:
     UNTIL '2025-12-11 12:36:30 +05:30'
     """
 
+    # WatsonX calls: concurrent per-condition insights with a per-call timeout
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "60"))
+    # Ask for all condition insights in one JSON response (per-condition calls fill any gaps)
+    LLM_STRUCTURED_INSIGHTS = os.getenv("LLM_STRUCTURED_INSIGHTS", "false").lower() == "true"
+
+    # LLM response cache (keyed by model, params and prompt)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_DISK = os.getenv("LLM_CACHE_DISK", "true").lower() == "true"
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+    # Reuse a condition's previous AI insight while its alert profile is unchanged
+    INSIGHT_REUSE_ENABLED = os.getenv("INSIGHT_REUSE_ENABLED", "true").lower() == "true"
+    INSIGHT_SIGNATURE_TOLERANCE = float(os.getenv("INSIGHT_SIGNATURE_TOLERANCE", "0.2"))
+    INSIGHT_REUSE_MAX_AGE_SECONDS = float(os.getenv("INSIGHT_REUSE_MAX_AGE_SECONDS", "86400"))
+
+    # Run deadline: Slack must get a notification within this many seconds of the run starting
+    TIME_TO_NOTIFY_SLO_SECONDS = float(os.getenv("TIME_TO_NOTIFY_SLO_SECONDS", "300"))
+    # Part of the budget kept for sending the notification itself
+    NOTIFY_RESERVE_SECONDS = float(os.getenv("NOTIFY_RESERVE_SECONDS", "15"))
+    # Below this much time left, optional NRQL enrichment is skipped
+    BUDGET_MIN_ENRICHMENT_SECONDS = float(os.getenv("BUDGET_MIN_ENRICHMENT_SECONDS", "20"))
+    # Below this much time left, insights come from the cache or rules instead of the LLM
+    BUDGET_MIN_LLM_SECONDS = float(os.getenv("BUDGET_MIN_LLM_SECONDS", "30"))
+
+    # Spike detection on the ALERT_QUERY TIMESERIES for each triggering incident
+    TIMESERIES_ANALYSIS_ENABLED = os.getenv("TIMESERIES_ANALYSIS_ENABLED", "true").lower() == "true"
+    TIMESERIES_EWMA_ALPHA = float(os.getenv("TIMESERIES_EWMA_ALPHA", "0.3"))
+    TIMESERIES_ZSCORE_WINDOW = int(os.getenv("TIMESERIES_ZSCORE_WINDOW", "30"))
+    TIMESERIES_ZSCORE_THRESHOLD = float(os.getenv("TIMESERIES_ZSCORE_THRESHOLD", "3.0"))
+    # Most of the run budget the per-incident time-series query may use (share of TIME_TO_NOTIFY_SLO_SECONDS)
+    TIMESERIES_BUDGET_SHARE = float(os.getenv("TIMESERIES_BUDGET_SHARE", "0.1"))
+
     # Analysis Query Configuration
     ANALYSIS_QUERY = """
     SELECT count(*) 
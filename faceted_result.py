@@ -0,0 +1,183 @@
+"""
+Columnar representation of faceted NRQL results.
+
+Each facet position becomes a dictionary-encoded column (an int32 code array
+plus the list of distinct values) and the aggregate becomes a float64 array,
+so sums, group-bys and distinct counts run as vectorized NumPy operations
+instead of repeated passes over lists of dicts. Top-k selections keep a
+k-item heap rather than sorting every row.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from topk import top_k
+
+
+def _plain(value: float) -> Any:
+    """Return an integral float as int (NRQL counts arrive as JSON numbers)."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class FacetedResult:
+    """Faceted NRQL rows stored as dictionary-encoded columns plus a value array."""
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        codes: Dict[str, np.ndarray],
+        categories: Dict[str, List[Any]],
+        values: np.ndarray,
+        value_name: str = "count"
+    ):
+        """
+        Args:
+            columns: Facet column names, in FACET order
+            codes: Per column, the category code of every row
+            categories: Per column, the distinct values (indexed by code)
+            values: Aggregate value of every row
+            value_name: Name of the aggregate in records()
+        """
+        self.columns = list(columns)
+        self.codes = codes
+        self.categories = categories
+        self.values = values
+        self.value_name = value_name
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Dict[str, Any]],
+        columns: Sequence[str],
+        value_field: str = "count",
+        value_name: Optional[str] = None,
+        defaults: Optional[Dict[str, Any]] = None
+    ) -> "FacetedResult":
+        """
+        Build a result from NRQL FACET rows (``{"facet": [...], "count": n}``).
+
+        Rows are consumed one at a time, so a streamed decoder can feed this
+        directly.
+
+        Args:
+            rows: NRQL result rows
+            columns: Names for the facet positions, in FACET order
+            value_field: Row key holding the aggregate
+            value_name: Name of the aggregate in records() (default: value_field)
+            defaults: Value per column for rows whose facet is missing that position
+                (default: "Unknown")
+
+        Returns:
+            The columnar result
+        """
+        defaults = defaults or {}
+        lookups = [{} for _ in columns]
+        categories = {name: [] for name in columns}
+        codes = [[] for _ in columns]
+        values = []
+
+        for row in rows:
+            facet = row.get("facet")
+            if not isinstance(facet, list):
+                facet = [facet]
+            for position, name in enumerate(columns):
+                value = facet[position] if position < len(facet) else defaults.get(name, "Unknown")
+                code = lookups[position].get(value)
+                if code is None:
+                    code = lookups[position][value] = len(categories[name])
+                    categories[name].append(value)
+                codes[position].append(code)
+            values.append(row.get(value_field) or 0)
+
+        return cls(
+            columns,
+            {name: np.asarray(codes[position], dtype=np.int32) for position, name in enumerate(columns)},
+            categories,
+            np.asarray(values, dtype=np.float64),
+            value_name or value_field
+        )
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def total(self) -> Any:
+        """Sum of the aggregate over all rows."""
+        return _plain(self.values.sum()) if len(self.values) else 0
+
+    def distinct_count(self, column: str, exclude: Iterable[Any] = ()) -> int:
+        """
+        Number of distinct values present in a column.
+
+        Args:
+            column: Facet column name
+            exclude: Values not to count (e.g. "Unknown")
+        """
+        present = np.bincount(self.codes[column], minlength=len(self.categories[column])) > 0
+        for value in exclude:
+            if value in self.categories[column]:
+                present[self.categories[column].index(value)] = False
+        return int(present.sum())
+
+    def group_by(self, column: str) -> "FacetedResult":
+        """
+        Sum the aggregate per value of one column.
+
+        Args:
+            column: Facet column name
+
+        Returns:
+            A single-column result with one row per distinct value
+        """
+        categories = self.categories[column]
+        codes = self.codes[column]
+        sums = np.bincount(codes, weights=self.values, minlength=len(categories))
+        present = np.flatnonzero(np.bincount(codes, minlength=len(categories)) > 0)
+        return FacetedResult(
+            [column],
+            {column: np.arange(len(present), dtype=np.int32)},
+            {column: [categories[code] for code in present]},
+            sums[present],
+            self.value_name
+        )
+
+    def top_k(self, k: int) -> np.ndarray:
+        """
+        Row indices of the k largest values, largest first.
+
+        Selected with a k-item heap (see topk.top_k), so only the kept rows
+        are ordered. Ties keep input order (the earlier row wins), matching a
+        stable descending sort.
+
+        Args:
+            k: Number of rows
+
+        Returns:
+            Row indices
+        """
+        values = self.values.tolist()
+        return np.asarray(top_k(range(len(values)), k, key=values.__getitem__), dtype=np.int64)
+
+    def records(self, indices: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Materialize rows as dicts of column values plus the aggregate.
+
+        Args:
+            indices: Row indices to include, in output order (default: all rows,
+                largest value first)
+
+        Returns:
+            List of row dicts
+        """
+        if indices is None:
+            indices = self.top_k(len(self))
+        records = []
+        for index in indices:
+            record = {name: self.categories[name][self.codes[name][index]] for name in self.columns}
+            record[self.value_name] = _plain(self.values[index])
+            records.append(record)
+        return records
+
+    def top_records(self, k: int) -> List[Dict[str, Any]]:
+        """The k largest rows as dicts, largest first."""
+        return self.records(self.top_k(k))
@@ -0,0 +1,168 @@
+"""
+Shared pooled HTTP transport for NerdGraph and Slack calls.
+
+Every outbound call goes through one requests.Session per host, so TCP and
+TLS connections are kept alive and reused instead of paying a fresh
+handshake on every request.
+"""
+import gzip
+import json
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+
+class HttpTransport:
+    """Keep-alive connection pools per host with optional gzip and reuse stats."""
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout: float = 30,
+        gzip_requests: bool = False
+    ):
+        """
+        Args:
+            pool_connections: Number of per-host pools kept by each session
+            pool_maxsize: Maximum open connections per host
+            timeout: Default request timeout in seconds
+            gzip_requests: Gzip-compress JSON request bodies by default
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.gzip_requests = gzip_requests
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._request_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def session_for(self, url: str) -> requests.Session:
+        """
+        Get (or create) the pooled session for the host of ``url``.
+
+        Args:
+            url: Request URL
+
+        Returns:
+            Session with a keep-alive connection pool for that host
+        """
+        host = self._host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["Accept-Encoding"] = "gzip, deflate"
+                self._sessions[host] = session
+                self._request_counts[host] = 0
+            self._request_counts[host] += 1
+            return session
+
+    def post(
+        self,
+        url: str,
+        json_body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        gzip_body: Optional[bool] = None,
+        stream: bool = False
+    ) -> requests.Response:
+        """
+        POST a JSON body over the shared connection pool.
+
+        Args:
+            url: Request URL
+            json_body: JSON-serializable request body
+            headers: Extra request headers
+            timeout: Request timeout in seconds (default: transport timeout)
+            gzip_body: Gzip the request body (default: transport setting)
+            stream: Leave the response body unread for streaming consumption
+
+        Returns:
+            The HTTP response
+        """
+        session = self.session_for(url)
+        request_headers = {"Content-Type": "application/json"}
+        request_headers.update(headers or {})
+
+        body = json.dumps(json_body).encode("utf-8")
+        if self.gzip_requests if gzip_body is None else gzip_body:
+            body = gzip.compress(body)
+            request_headers["Content-Encoding"] = "gzip"
+
+        return session.post(
+            url,
+            data=body,
+            headers=request_headers,
+            timeout=timeout if timeout is not None else self.timeout,
+            stream=stream
+        )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-host request and connection counts.
+
+        Returns:
+            {host: {"requests", "connections", "reused"}} where ``reused`` is the
+            number of requests served over an already-open connection
+        """
+        result = {}
+        with self._lock:
+            for host, session in self._sessions.items():
+                connections = 0
+                adapter = session.get_adapter(host)
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                requests_made = self._request_counts.get(host, 0)
+                result[host] = {
+                    "requests": requests_made,
+                    "connections": connections,
+                    "reused": max(0, requests_made - connections)
+                }
+        return result
+
+    def close(self):
+        """Close every pooled session."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Get the process-wide HTTP transport configured by HTTP_* settings."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport(
+                    pool_connections=Config.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+                    timeout=Config.HTTP_TIMEOUT_SECONDS,
+                    gzip_requests=Config.HTTP_GZIP_REQUESTS
+                )
+    return _transport
@@ -0,0 +1,341 @@
+"""
+Producer/consumer runtime for the polling server.
+
+The poller only enqueues incidents; a pool of worker threads runs the agent
+graph. The queue is bounded, so a slow WatsonX call or NRQL query applies
+explicit backpressure (drop/coalesce) instead of delaying the next poll.
+"""
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+from config import Config
+
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class IncidentWorkQueue:
+    """
+    Bounded FIFO of incidents with coalescing and an overflow policy.
+
+    - Coalescing: an incident whose ID is already queued replaces the queued
+      payload in place (latest data wins) instead of taking a second slot.
+      This covers producers that may offer an incident again while it is
+      still queued (e.g. a dropped incident re-offered by the poller).
+    - drop_oldest: when full, evict the oldest queued incident
+    - drop_newest: when full, reject the incoming incident
+    - block: when full, wait up to ``block_timeout`` seconds, then reject
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 100,
+        overflow_policy: str = "drop_oldest",
+        block_timeout: float = 1.0,
+        on_drop: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """
+        Args:
+            maxsize: Maximum number of queued incidents
+            overflow_policy: One of OVERFLOW_POLICIES
+            block_timeout: Seconds to wait for space under the "block" policy
+            on_drop: Called with every incident the overflow policy drops
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy} (expected one of {', '.join(OVERFLOW_POLICIES)})")
+
+        self.maxsize = max(1, maxsize)
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.on_drop = on_drop
+
+        self._items = deque()  # entries: [key, incident, enqueued_at]
+        self._by_key = {}
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.stats = {"enqueued": 0, "coalesced": 0, "dropped": 0, "dequeued": 0}
+
+    def put(self, incident: Dict[str, Any]) -> bool:
+        """
+        Enqueue an incident without ever blocking longer than ``block_timeout``.
+
+        Args:
+            incident: Incident to process
+
+        Returns:
+            True if the incident was queued (or coalesced), False if dropped
+        """
+        key = incident.get("incidentId")
+
+        with self._cond:
+            if self._closed:
+                return False
+
+            entry = self._by_key.get(key) if key is not None else None
+            if entry is not None:
+                entry[1] = incident
+                self.stats["coalesced"] += 1
+                return True
+
+            if self._size() >= self.maxsize:
+                if self.overflow_policy == "drop_newest":
+                    self._record_drop(incident)
+                    return False
+                if self.overflow_policy == "block":
+                    deadline = time.monotonic() + self.block_timeout
+                    while self._size() >= self.maxsize and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._record_drop(incident)
+                            return False
+                        self._cond.wait(remaining)
+                    if self._closed:
+                        return False
+                else:
+                    evicted = self._evict(incident)
+                    if evicted is None:
+                        # Everything queued outranks the incoming incident
+                        self._record_drop(incident)
+                        return False
+                    self._by_key.pop(evicted[0], None)
+                    self._record_drop(evicted[1])
+                    print(f"⚠️  Work queue full - dropped incident {evicted[0]} (retried on a later poll)")
+
+            entry = [key, incident, time.monotonic()]
+            self._append(entry)
+            if key is not None:
+                self._by_key[key] = entry
+            self.stats["enqueued"] += 1
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Dequeue the next incident.
+
+        Args:
+            timeout: Seconds to wait for an item (default: wait until closed)
+
+        Returns:
+            The incident, or None on timeout / when the queue is closed and empty
+        """
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._size():
+                if self._closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+            key, incident, _ = self._pop()
+            self._by_key.pop(key, None)
+            self.stats["dequeued"] += 1
+            self._cond.notify_all()
+            return incident
+
+    def _record_drop(self, incident: Dict[str, Any]):
+        self.stats["dropped"] += 1
+        if self.on_drop is not None:
+            self.on_drop(incident)
+
+    def _append(self, entry: list):
+        self._items.append(entry)
+
+    def _pop(self) -> list:
+        return self._items.popleft()
+
+    def _evict(self, incoming: Dict[str, Any]) -> Optional[list]:
+        """Entry to evict for ``incoming``, or None to reject ``incoming`` instead."""
+        return self._items.popleft()
+
+    def _size(self) -> int:
+        return len(self._items)
+
+    def close(self):
+        """Stop accepting new incidents and wake any waiting workers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def qsize(self) -> int:
+        return self._size()
+
+
+PRIORITY_ORDER = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
+
+
+class PriorityIncidentQueue(IncidentWorkQueue):
+    """
+    Incident queue that serves higher-priority incidents first without starvation.
+
+    Each priority level has its own FIFO. The next incident is the queue head
+    with the lowest ``rank * aging_seconds - waited_seconds``: a CRITICAL
+    incident beats a LOW one unless the LOW one has already waited
+    ``3 * aging_seconds`` longer, so every incident is eventually served.
+    Overflow under ``drop_oldest`` evicts the oldest incident of the
+    lowest-priority queued level, unless the incoming incident ranks below
+    everything queued - then the incoming incident is dropped instead.
+    """
+
+    def __init__(self, maxsize: int = 100, overflow_policy: str = "drop_oldest",
+                 block_timeout: float = 1.0, aging_seconds: float = 120.0,
+                 on_drop: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            maxsize: Maximum number of queued incidents
+            overflow_policy: One of OVERFLOW_POLICIES
+            block_timeout: Seconds to wait for space under the "block" policy
+            aging_seconds: Queue wait that is worth one priority level
+            on_drop: Called with every incident the overflow policy drops
+        """
+        super().__init__(maxsize=maxsize, overflow_policy=overflow_policy,
+                         block_timeout=block_timeout, on_drop=on_drop)
+        self.aging_seconds = aging_seconds
+        self._levels = {name: deque() for name in PRIORITY_ORDER + ("OTHER",)}
+        self._wait_stats = {name: {"count": 0, "total_wait": 0.0, "max_wait": 0.0} for name in self._levels}
+
+    @staticmethod
+    def _level(incident: Dict[str, Any]) -> str:
+        priority = str(incident.get("priority") or "").upper()
+        return priority if priority in PRIORITY_ORDER else "OTHER"
+
+    def _append(self, entry: list):
+        self._levels[self._level(entry[1])].append(entry)
+
+    def _pop(self) -> list:
+        now = time.monotonic()
+        best_level = None
+        best_score = None
+        for rank, (name, items) in enumerate(self._levels.items()):
+            if not items:
+                continue
+            score = rank * self.aging_seconds - (now - items[0][2])
+            if best_score is None or score < best_score:
+                best_level, best_score = name, score
+
+        entry = self._levels[best_level].popleft()
+        waited = now - entry[2]
+        stats = self._wait_stats[best_level]
+        stats["count"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+        return entry
+
+    def _evict(self, incoming: Dict[str, Any]) -> Optional[list]:
+        levels = list(self._levels)
+        incoming_rank = levels.index(self._level(incoming))
+        for rank in range(len(levels) - 1, -1, -1):
+            items = self._levels[levels[rank]]
+            if items:
+                return items.popleft() if rank >= incoming_rank else None
+        raise IndexError("evict from an empty queue")
+
+    def _size(self) -> int:
+        return sum(len(items) for items in self._levels.values())
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-priority queue depth and wait-time metrics.
+
+        Returns:
+            {priority: {"depth", "dequeued", "avg_wait_seconds", "max_wait_seconds"}}
+        """
+        with self._cond:
+            result = {}
+            for name, items in self._levels.items():
+                stats = self._wait_stats[name]
+                result[name] = {
+                    "depth": len(items),
+                    "dequeued": stats["count"],
+                    "avg_wait_seconds": round(stats["total_wait"] / stats["count"], 3) if stats["count"] else 0.0,
+                    "max_wait_seconds": round(stats["max_wait"], 3)
+                }
+            return result
+
+
+class IncidentWorkerPool:
+    """Fixed pool of worker threads draining an IncidentWorkQueue."""
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Any], queue: IncidentWorkQueue, num_workers: int = 2):
+        """
+        Args:
+            handler: Function that processes a single incident
+            queue: Queue to drain
+            num_workers: Number of worker threads
+        """
+        self.handler = handler
+        self.queue = queue
+        self.num_workers = max(1, num_workers)
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads."""
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._run, name=f"incident-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, incident: Dict[str, Any]) -> bool:
+        """Queue an incident for processing (see IncidentWorkQueue.put)."""
+        return self.queue.put(incident)
+
+    def _run(self):
+        while True:
+            incident = self.queue.get()
+            if incident is None:
+                return
+            try:
+                self.handler(incident)
+            except Exception as e:
+                print(f"❌ Worker failed to process incident {incident.get('incidentId')}: {str(e)}")
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop accepting work and wait for workers to drain the queue.
+
+        Args:
+            timeout: Maximum seconds to wait per worker (default: wait indefinitely)
+        """
+        self.queue.close()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+def create_worker_pool(
+    handler: Callable[[Dict[str, Any]], Any],
+    num_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    overflow_policy: Optional[str] = None,
+    on_drop: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> IncidentWorkerPool:
+    """
+    Create a worker pool, defaulting to the WORKER_* settings.
+
+    WORKER_SCHEDULING selects the queue: "priority" (default) serves CRITICAL
+    incidents first with aging, "fifo" keeps NerdGraph order.
+
+    Args:
+        handler: Function that processes a single incident
+        num_workers: Number of worker threads (default: Config.WORKER_COUNT)
+        queue_size: Maximum queued incidents (default: Config.WORKER_QUEUE_SIZE)
+        overflow_policy: Overflow policy (default: Config.WORKER_OVERFLOW_POLICY)
+        on_drop: Called with every incident the queue drops
+
+    Returns:
+        Unstarted worker pool
+    """
+    queue_kwargs = {
+        "maxsize": queue_size or Config.WORKER_QUEUE_SIZE,
+        "overflow_policy": overflow_policy or Config.WORKER_OVERFLOW_POLICY,
+        "block_timeout": Config.WORKER_QUEUE_BLOCK_SECONDS,
+        "on_drop": on_drop
+    }
+    if Config.WORKER_SCHEDULING == "priority":
+        queue = PriorityIncidentQueue(aging_seconds=Config.WORKER_PRIORITY_AGING_SECONDS, **queue_kwargs)
+    else:
+        queue = IncidentWorkQueue(**queue_kwargs)
+    return IncidentWorkerPool(handler, queue, num_workers=num_workers or Config.WORKER_COUNT)
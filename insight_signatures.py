@@ -0,0 +1,177 @@
+"""
+Signature-based reuse of per-condition AI insights.
+
+A condition's prompt changes on every run (its occurrence count ticks from
+41 to 42), so exact-prompt caching rarely hits even when nothing meaningful
+changed. A signature captures the alert profile coarsely - occurrence count
+bucket, priority mix, close-cause mix and duration quantiles - and is stored
+per conditionId with the insight generated for it. When the next run's
+signature matches within tolerance, that insight is reused instead of
+calling the LLM.
+"""
+import os
+import json
+import math
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+from config import Config
+
+
+def _shares(counts: Dict[str, Any]) -> Dict[str, float]:
+    total = sum(counts.values())
+    return {str(key): round(value / total, 3) for key, value in counts.items()} if total else {}
+
+
+def condition_signature(details: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the alert-profile signature of a condition.
+
+    Args:
+        details: condition_details entry (occurrence_count, stats, recent_alerts)
+
+    Returns:
+        {"count_bucket", "priority_mix", "close_cause_mix", "duration_quantiles"}
+    """
+    stats = details.get("stats") or {}
+
+    priority_counts = dict(stats.get("priority_counts") or {})
+    if not priority_counts:
+        for alert in details.get("recent_alerts", []):
+            priority = alert.get("priority") or "Unknown"
+            priority_counts[priority] = priority_counts.get(priority, 0) + 1
+
+    count = details.get("occurrence_count", 0) or 0
+    return {
+        # log2 buckets: 32-63 occurrences look the same, 64 starts a new bucket
+        "count_bucket": int(math.log2(count + 1)),
+        "priority_mix": _shares(priority_counts),
+        "close_cause_mix": _shares(stats.get("close_cause_counts") or {}),
+        "duration_quantiles": {
+            str(p): float(value) for p, value in (stats.get("duration_percentiles") or {}).items()
+        }
+    }
+
+
+def _mix_distance(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """Total variation distance between two share distributions (0 = identical, 1 = disjoint)."""
+    return sum(abs(a.get(key, 0.0) - b.get(key, 0.0)) for key in set(a) | set(b)) / 2
+
+
+def signatures_match(a: Dict[str, Any], b: Dict[str, Any], tolerance: float = 0.2) -> bool:
+    """
+    Whether two signatures describe the same alert profile.
+
+    Args:
+        a: Signature
+        b: Signature
+        tolerance: Allowed share shift in the priority / close-cause mixes and
+            relative change in each duration quantile
+
+    Returns:
+        True if the insight generated for one can be reused for the other
+    """
+    if a.get("count_bucket") != b.get("count_bucket"):
+        return False
+    if _mix_distance(a.get("priority_mix") or {}, b.get("priority_mix") or {}) > tolerance:
+        return False
+    if _mix_distance(a.get("close_cause_mix") or {}, b.get("close_cause_mix") or {}) > tolerance:
+        return False
+
+    quantiles_a = a.get("duration_quantiles") or {}
+    quantiles_b = b.get("duration_quantiles") or {}
+    if set(quantiles_a) != set(quantiles_b):
+        return False
+    for key, value in quantiles_a.items():
+        other = quantiles_b[key]
+        if abs(value - other) > tolerance * max(abs(value), abs(other), 60.0):
+            return False
+    return True
+
+
+class InsightStore:
+    """SQLite store of the last signature and insight per conditionId."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file
+        """
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS condition_insights ("
+            "condition_id TEXT PRIMARY KEY, signature TEXT NOT NULL, insight TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, condition_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Last stored entry for a condition.
+
+        Returns:
+            {"signature", "insight", "updated_at"} or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT signature, insight, updated_at FROM condition_insights WHERE condition_id = ?",
+                (str(condition_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"signature": json.loads(row[0]), "insight": row[1], "updated_at": row[2]}
+
+    def put(self, condition_id: Any, signature: Dict[str, Any], insight: str):
+        """Store the signature and the insight generated for it."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO condition_insights (condition_id, signature, insight, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (str(condition_id), json.dumps(signature, sort_keys=True), insight, time.time())
+            )
+            self._conn.commit()
+
+    def reusable_insight(
+        self,
+        condition_id: Any,
+        signature: Dict[str, Any],
+        tolerance: float,
+        max_age_seconds: float
+    ) -> Optional[str]:
+        """
+        The stored insight for a condition, if its signature still matches.
+
+        Args:
+            condition_id: Alert condition ID
+            signature: Current signature
+            tolerance: See signatures_match
+            max_age_seconds: Never reuse insights older than this
+
+        Returns:
+            The insight text, or None if a new one should be generated
+        """
+        entry = self.get(condition_id)
+        if entry is None or time.time() - entry["updated_at"] > max_age_seconds:
+            return None
+        if not signatures_match(entry["signature"], signature, tolerance):
+            return None
+        return entry["insight"]
+
+
+_store: Optional[InsightStore] = None
+_store_lock = threading.Lock()
+
+
+def get_insight_store() -> Optional[InsightStore]:
+    """Get the process-wide insight store, or None when INSIGHT_REUSE_ENABLED is off."""
+    global _store
+    if not Config.INSIGHT_REUSE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = InsightStore(os.path.join(Config.STATE_DIR, "insights.db"))
+    return _store
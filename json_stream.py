@@ -0,0 +1,145 @@
+"""
+Incremental decoding of large NerdGraph responses.
+
+``response.json()`` reads the whole body into memory and then builds the
+whole object tree, so a multi-MB NRQL result is held twice. GraphQLStream
+instead walks the body as it arrives and yields the items of one array (for
+example ``data.actor.account.nrql.results``) one at a time, so peak memory
+is proportional to a single row rather than the response.
+
+Streaming needs the optional ``ijson`` package; without it the body is
+decoded in one go (with ``orjson`` when installed, else the json module) and
+the same interface is served from the decoded object.
+"""
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+try:
+    import ijson
+except ImportError:  # optional dependency
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+NRQL_RESULTS_PATH = "data.actor.account.nrql.results"
+
+
+def loads(data: Any) -> Any:
+    """Decode a JSON document with the fastest available backend."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_response(response) -> Any:
+    """Decode a whole ``requests`` response body (replacement for response.json())."""
+    return loads(response.content)
+
+
+def _walk(data: Any, path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+class GraphQLStream:
+    """
+    Iterate the items of one array inside a GraphQL JSON response.
+
+    Other values can be captured on the way (e.g. a pagination cursor) and
+    GraphQL ``errors`` are collected; both are complete once iteration has
+    finished, since the server may send them after the array.
+
+    Example:
+        stream = GraphQLStream(response, NRQL_RESULTS_PATH)
+        for row in stream:
+            ...
+        if stream.errors:
+            ...
+    """
+
+    def __init__(self, response, items_path: str, capture: Iterable[str] = ()):
+        """
+        Args:
+            response: ``requests`` response, ideally requested with stream=True
+            items_path: Dotted path of the array to iterate
+            capture: Dotted paths of scalar values to keep (see ``captured``)
+        """
+        self.response = response
+        self.items_path = items_path
+        self.capture = tuple(capture)
+        self.errors: List[Any] = []
+        self.captured: Dict[str, Any] = {}
+        self.streamed = ijson is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            if ijson is None:
+                yield from self._iter_decoded()
+            else:
+                yield from self._iter_stream()
+        finally:
+            self.close()
+
+    def _iter_decoded(self) -> Iterator[Any]:
+        data = load_response(self.response)
+        self.errors = list(data.get("errors") or []) if isinstance(data, dict) else []
+        for path in self.capture:
+            self.captured[path] = _walk(data, path)
+        yield from _walk(data, self.items_path) or []
+
+    def _iter_stream(self) -> Iterator[Any]:
+        raw = self.response.raw
+        raw.decode_content = True  # let urllib3 undo gzip/deflate
+        events = ijson.parse(raw, use_float=True)
+
+        item_prefix = self.items_path + ".item"
+        for prefix, event, value in events:
+            if prefix == item_prefix:
+                yield self._build(events, prefix, event, value)
+            elif prefix == "errors.item":
+                self.errors.append(self._build(events, prefix, event, value))
+            elif prefix in self.capture and event not in ("start_map", "start_array", "map_key"):
+                self.captured[prefix] = value
+
+    @staticmethod
+    def _build(events, item_prefix: str, event: str, value: Any) -> Any:
+        """Assemble one array item from the event stream."""
+        if event not in ("start_map", "start_array"):
+            return value
+        builder = ijson.ObjectBuilder()
+        builder.event(event, value)
+        depth = 1
+        for prefix, event, value in events:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    break
+        return builder.value
+
+    def close(self):
+        """Release the connection back to the pool (also when iteration stops early)."""
+        self.response.close()
+
+
+def iter_nrql_results(response) -> Iterator[Dict[str, Any]]:
+    """
+    Yield NRQL result rows from a single-query NerdGraph response.
+
+    Raises:
+        Exception: If the response carries GraphQL errors (raised after the
+            rows received before them)
+    """
+    stream = GraphQLStream(response, NRQL_RESULTS_PATH)
+    yield from stream
+    if stream.errors:
+        raise Exception(f"GraphQL errors: {stream.errors}")
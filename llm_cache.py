@@ -0,0 +1,253 @@
+"""
+Content-addressed cache of LLM responses.
+
+Prompts built from the same alert data are byte-identical between runs, and
+the summary models decode greedily, so the same (model, params, prompt)
+always produces the same text. Responses are stored under
+``sha256(model_id, params, prompt)`` in a small in-memory LRU backed by
+SQLite, with a TTL and a size bound, so repeated analyses are served locally
+without a WatsonX generation.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional
+from config import Config
+
+
+def llm_cache_key(model_id: str, params: Optional[Dict[str, Any]], prompt: str) -> str:
+    """Hash of everything that determines a generation."""
+    raw = json.dumps([model_id, params or {}, prompt], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Memory + SQLite cache of LLM responses with TTL and LRU size bounds."""
+
+    def __init__(
+        self,
+        disk_path: Optional[str],
+        ttl_seconds: float = 86400,
+        max_entries: int = 5000,
+        memory_entries: int = 256
+    ):
+        """
+        Args:
+            disk_path: SQLite file for the disk tier (None keeps the cache in memory only)
+            ttl_seconds: How long a response stays valid
+            max_entries: Size bound of the disk tier (least recently used evicted first)
+            memory_entries: Size bound of the in-memory tier
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+
+        self._memory = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+        self._metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._conn = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False, timeout=5)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "cache_key TEXT PRIMARY KEY, model_id TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "last_access REAL NOT NULL, response TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+            self._conn.commit()
+
+    def get(self, model_id: str, params: Optional[Dict[str, Any]], prompt: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Returns:
+            The cached response text, or None on a miss
+        """
+        key = llm_cache_key(model_id, params, prompt)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._metrics["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT expires_at, response FROM llm_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+                    self._conn.commit()
+                    self._store_memory(key, row[0], row[1])
+                    self._metrics["disk_hits"] += 1
+                    return row[1]
+
+            self._metrics["misses"] += 1
+            return None
+
+    def put(self, model_id: str, params: Optional[Dict[str, Any]], prompt: str, response: str):
+        """Store a response."""
+        key = llm_cache_key(model_id, params, prompt)
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+
+        with self._lock:
+            self._store_memory(key, expires_at, response)
+            self._metrics["stores"] += 1
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (cache_key, model_id, expires_at, last_access, response) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model_id, expires_at, now, response)
+                )
+                self._evict_disk(now)
+                self._conn.commit()
+
+    def _store_memory(self, key: str, expires_at: float, response: str):
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float):
+        """Delete expired rows, then least recently used rows beyond max_entries."""
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE cache_key IN "
+                "(SELECT cache_key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            self._metrics["evictions"] += count - self.max_entries
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Cache hit/miss metrics.
+
+        Returns:
+            Counters plus ``hit_rate``
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            lookups = metrics["memory_hits"] + metrics["disk_hits"] + metrics["misses"]
+            metrics["hit_rate"] = round((metrics["memory_hits"] + metrics["disk_hits"]) / lookups, 3) if lookups else 0.0
+            metrics["memory_entries"] = len(self._memory)
+            return metrics
+
+
+class CachedLLM:
+    """
+    LLM wrapper that answers repeated prompts from an LLMResponseCache.
+
+    The underlying client is only created on the first cache miss, so a
+    fully cached run never initializes WatsonX.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        model_id: str,
+        params: Optional[Dict[str, Any]],
+        cache: LLMResponseCache
+    ):
+        """
+        Args:
+            factory: Creates the underlying client (called at most once)
+            model_id: Model ID (part of the cache key)
+            params: Generation parameters (part of the cache key)
+            cache: Response cache
+        """
+        self.model_id = model_id
+        self.params = params or {}
+        self.cache = cache
+        self._factory = factory
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The underlying LLM client."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def invoke(self, prompt: str, **kwargs) -> Any:
+        """
+        Generate a response, serving identical prompts from the cache.
+
+        Calls with extra keyword arguments (stop sequences, configs, ...)
+        bypass the cache since they are not part of the key.
+        """
+        if kwargs or not isinstance(prompt, str):
+            return self.client.invoke(prompt, **kwargs)
+
+        cached = self.cache.get(self.model_id, self.params, prompt)
+        if cached is not None:
+            return cached
+
+        response = self.client.invoke(prompt)
+        if isinstance(response, str):
+            self.cache.put(self.model_id, self.params, prompt, response)
+        return response
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[Any]:
+        """
+        Stream a response, serving identical prompts from the cache.
+
+        A cached response is yielded as a single chunk; a generated one is
+        stored once the stream has completed.
+        """
+        if kwargs or not isinstance(prompt, str):
+            yield from self.client.stream(prompt, **kwargs)
+            return
+
+        cached = self.cache.get(self.model_id, self.params, prompt)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        for chunk in self.client.stream(prompt):
+            chunks.append(chunk if isinstance(chunk, str) else str(chunk))
+            yield chunk
+        self.cache.put(self.model_id, self.params, prompt, "".join(chunks))
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything not defined here (batch, generate, ...) goes straight to the client
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the process-wide LLM response cache, or None when LLM_CACHE_ENABLED is off."""
+    global _cache
+    if not Config.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache(
+                    disk_path=os.path.join(Config.STATE_DIR, "llm_cache.db") if Config.LLM_CACHE_DISK else None,
+                    ttl_seconds=Config.LLM_CACHE_TTL_SECONDS,
+                    max_entries=Config.LLM_CACHE_MAX_ENTRIES
+                )
+    return _cache
@@ -0,0 +1,147 @@
+"""
+Lazily initialized, process-wide LLM clients.
+
+Node modules used to build a WatsonxLLM at import time, so merely importing
+agent_graph (test_graph.py, ``langgraph dev`` startup) paid for the
+langchain_ibm import plus client and auth setup, once per module. Clients
+are now created on first use and shared by every caller asking for the same
+model and parameters. When the LLM response cache is enabled, callers get a
+CachedLLM that only creates the client on its first cache miss.
+"""
+import json
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+from config import Config
+from llm_cache import CachedLLM, get_llm_cache
+
+
+_clients: Dict[tuple, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _registry_key(model_id: str, params: Optional[Dict[str, Any]]) -> tuple:
+    return model_id, json.dumps(params or {}, sort_keys=True)
+
+
+def _create_client(model_id: str, params: Optional[Dict[str, Any]]):
+    """Create a WatsonxLLM client."""
+    from langchain_ibm import WatsonxLLM  # deferred: slow to import
+
+    print(f"🤖 Initializing IBM WatsonX {model_id}")
+    return WatsonxLLM(
+        model_id=model_id,
+        url=Config.WATSONX_URL,
+        apikey=Config.WATSONX_APIKEY,
+        project_id=Config.WATSONX_PROJECT_ID,
+        params=params or {}
+    )
+
+
+def get_llm(model_id: str, params: Optional[Dict[str, Any]] = None, use_cache: bool = True):
+    """
+    Get the shared WatsonX client for a model and generation parameters.
+
+    The client (and the langchain_ibm import) is created on the first call
+    for a given (model_id, params) pair and reused afterwards. Unless the
+    cache is bypassed, the client is wrapped in a CachedLLM.
+
+    Args:
+        model_id: WatsonX model ID (e.g. "ibm/granite-3-8b-instruct")
+        params: Generation parameters
+        use_cache: Serve repeated prompts from the LLM response cache
+            (default: True; no effect when LLM_CACHE_ENABLED is off)
+
+    Returns:
+        WatsonxLLM instance, or a CachedLLM wrapping one
+    """
+    cache = get_llm_cache() if use_cache else None
+    key = _registry_key(model_id, params) + (cache is not None,)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                if cache is not None:
+                    client = CachedLLM(lambda: get_llm(model_id, params, use_cache=False), model_id, params, cache)
+                else:
+                    client = _create_client(model_id, params)
+                _clients[key] = client
+    return client
+
+
+def invoke_parallel(
+    llm,
+    prompts: List[str],
+    max_workers: int = 4,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None
+) -> List[Any]:
+    """
+    Invoke an LLM on several prompts concurrently.
+
+    Each call gets its own timeout, counted from when it actually starts
+    (calls waiting for a free worker are not charged). A failed or timed-out
+    call only affects its own slot. Timed-out calls cannot be interrupted;
+    they finish in the background and their results are discarded.
+
+    Args:
+        llm: Object with an ``invoke(prompt)`` method
+        prompts: Prompts to run
+        max_workers: Maximum calls in flight at once
+        timeout: Per-call timeout in seconds (None or 0: no timeout)
+        deadline: time.monotonic() value after which every unfinished call
+            times out, whether started or still queued
+
+    Returns:
+        One entry per prompt, in input order: the response, or the Exception
+        the call raised (TimeoutError when it timed out)
+    """
+    results: List[Any] = [None] * len(prompts)
+    if not prompts:
+        return results
+
+    started: List[Optional[float]] = [None] * len(prompts)
+
+    def call(index: int):
+        started[index] = time.monotonic()
+        return llm.invoke(prompts[index])
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts))), thread_name_prefix="llm")
+    try:
+        futures = {pool.submit(call, index): index for index in range(len(prompts))}
+        pending = set(futures)
+        while pending:
+            wait_for = None
+            if timeout:
+                expiries = [started[futures[f]] + timeout for f in pending if started[futures[f]] is not None]
+                wait_for = max(0.0, min(expiries) - time.monotonic()) if expiries else 0.05
+            if deadline is not None:
+                until_deadline = max(0.0, deadline - time.monotonic())
+                wait_for = until_deadline if wait_for is None else min(wait_for, until_deadline)
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = e
+
+            if timeout:
+                now = time.monotonic()
+                for future in list(pending):
+                    index = futures[future]
+                    if started[index] is not None and now - started[index] >= timeout:
+                        results[index] = TimeoutError(f"LLM call timed out after {timeout:g}s")
+                        pending.discard(future)
+
+            if deadline is not None and pending and time.monotonic() >= deadline:
+                for future in pending:
+                    results[futures[future]] = TimeoutError("LLM call cut off by the run deadline")
+                pending = set()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return results
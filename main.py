@@ -2,6 +2,7 @@
 import sys
 from agent_graph import create_agent_graph
 from agent_state import AgentState
+from run_budget import start_deadline
 
 
 def run_agent():
@@ -27,6 +28,7 @@ def run_agent():
         "key_insights": None,
         "slack_sent": False,
         "errors": [],
+        "deadline": start_deadline(),
         "current_step": "init",
         "next_step": None
     }
@@ -3,9 +3,33 @@
 This client uses New Relic's NerdGraph (GraphQL) API to execute NRQL queries.
 Documentation: https://docs.newrelic.com/docs/apis/nerdgraph/get-started/introduction-new-relic-nerdgraph/
 """
+import time
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Union
 from config import Config
+from http_transport import get_transport
+from faceted_result import FacetedResult
+from json_stream import iter_nrql_results, load_response
+from nrql_cache import get_nrql_cache
+
+
+class NerdGraphRateLimitError(Exception):
+    """Raised when NerdGraph answers 429 Too Many Requests."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"NerdGraph rate limit exceeded (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+def _raise_for_rate_limit(response: requests.Response):
+    """Raise NerdGraphRateLimitError for a 429 response, honouring Retry-After."""
+    if response.status_code != 429:
+        return
+    try:
+        retry_after = float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        retry_after = None
+    raise NerdGraphRateLimitError(retry_after)
 
 
 class NewRelicClient:
@@ -19,16 +43,54 @@ class NewRelicClient:
             "API-Key": self.api_key,
             "Content-Type": "application/json"
         }
+        self.cache = get_nrql_cache()
 
-    def execute_nrql_query(self, query: str) -> Dict[str, Any]:
+    def execute_nrql_query(self, query: str, use_cache: bool = True) -> Dict[str, Any]:
         """
         Execute a NRQL query using New Relic's NerdGraph (GraphQL) API.
 
+        Results are served from / stored in the NRQL result cache when enabled.
+
         Args:
             query: The NRQL query to execute
+            use_cache: Consult the result cache (default: True)
 
         Returns:
             Query results as a dictionary
+
+        Raises:
+            NerdGraphRateLimitError: NerdGraph answered 429
+        """
+        if use_cache and self.cache is not None:
+            cached = self.cache.get(query)
+            if cached is not None:
+                return cached
+
+        # Rows are decoded as the body streams in, so the raw body and the
+        # decoded rows are never both held in full
+        nrql = {"results": list(self.iter_nrql_results(query))}
+
+        if use_cache and self.cache is not None:
+            self.cache.put(query, nrql)
+
+        return nrql
+
+    def iter_nrql_results(self, query: str) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a NRQL query and yield its result rows as they are decoded.
+
+        Unlike execute_nrql_query this never builds the full result list, so
+        a caller that folds rows one at a time (counting, top-k, ...) keeps
+        memory proportional to a single row. Results are not cached.
+
+        Args:
+            query: The NRQL query to execute
+
+        Yields:
+            NRQL result rows
+
+        Raises:
+            NerdGraphRateLimitError: NerdGraph answered 429
         """
         graphql_query = """
         query($accountId: Int!, $nrql: Nrql!) {
@@ -36,13 +98,6 @@ class NewRelicClient:
             account(id: $accountId) {
               nrql(query: $nrql) {
                 results
-                metadata {
-                  timeWindow {
-                    begin
-                    end
-                  }
-                  eventTypes
-                }
               }
             }
           }
@@ -60,24 +115,259 @@ class NewRelicClient:
         }
 
         try:
-            response = requests.post(
+            response = get_transport().post(
                 self.graphql_endpoint,
-                json=payload,
+                json_body=payload,
                 headers=self.headers,
-                timeout=30
+                stream=True
             )
-            response.raise_for_status()
+            # Closing the streamed response returns its connection to the pool,
+            # also when a status check raises before the body is read
+            with response:
+                _raise_for_rate_limit(response)
+                response.raise_for_status()
+
+                yield from iter_nrql_results(response)
+
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to execute NRQL query: {str(e)}")
+
+    def execute_nrql_batch(
+        self,
+        queries: List[str],
+        batch_size: Optional[int] = None,
+        use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute several NRQL queries with as few NerdGraph requests as possible.
 
-            data = response.json()
+        Queries are packed into one GraphQL document as aliased ``nrql`` fields
+        (``q0: nrql(query: $q0) {...}``), up to ``batch_size`` per request, and
+        results are mapped back per alias. A failing query only fails its own
+        entry; the other queries in the same request still return results.
+        Cached queries are answered locally and only misses are sent.
+
+        Args:
+            queries: NRQL queries to execute
+            batch_size: Maximum queries per request (default: Config.NRQL_BATCH_SIZE)
+            use_cache: Consult the result cache (default: True)
+
+        Returns:
+            One entry per query, in input order: {"results": [...], "error": None}
+            on success or {"results": [], "error": "..."} on failure
+        """
+        batch_size = max(1, batch_size or Config.NRQL_BATCH_SIZE)
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+
+        cache = self.cache if use_cache else None
+        pending = []
+        for index, query in enumerate(queries):
+            cached = cache.get(query) if cache is not None else None
+            if cached is not None:
+                outcomes[index] = {"results": cached.get("results") or [], "error": None}
+            else:
+                pending.append(index)
+
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            chunk_outcomes = self._execute_nrql_chunk([queries[index] for index in chunk])
+            for index, outcome in zip(chunk, chunk_outcomes):
+                outcomes[index] = outcome
+                if cache is not None and outcome["error"] is None:
+                    cache.put(queries[index], {"results": outcome["results"]})
+
+        return outcomes
+
+    def _execute_nrql_chunk(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Execute one aliased multi-query NerdGraph request.
+
+        Args:
+            queries: NRQL queries that fit in a single request
+
+        Returns:
+            One outcome per query (see execute_nrql_batch)
+        """
+        aliases = [f"q{i}" for i in range(len(queries))]
+        declarations = ", ".join(f"${alias}: Nrql!" for alias in aliases)
+        fields = "\n".join(
+            f"              {alias}: nrql(query: ${alias}) {{ results }}" for alias in aliases
+        )
+        graphql_query = f"""
+        query($accountId: Int!, {declarations}) {{
+          actor {{
+            account(id: $accountId) {{
+{fields}
+            }}
+          }}
+        }}
+        """
 
-            if "errors" in data:
-                raise Exception(f"GraphQL errors: {data['errors']}")
+        variables = {"accountId": int(self.account_id)}
+        variables.update(zip(aliases, queries))
 
-            return data.get("data", {}).get("actor", {}).get("account", {}).get("nrql", {})
+        try:
+            response = get_transport().post(
+                self.graphql_endpoint,
+                json_body={"query": graphql_query, "variables": variables},
+                headers=self.headers
+            )
+            _raise_for_rate_limit(response)
+            response.raise_for_status()
+            data = load_response(response)
+        except requests.exceptions.RequestException as e:
+            error = f"Failed to execute NRQL batch: {str(e)}"
+            return [{"results": [], "error": error} for _ in queries]
+
+        # Attribute GraphQL errors to the alias in their path; errors without an
+        # alias path apply to every query that did not return data
+        alias_errors: Dict[str, List[Any]] = {}
+        shared_errors = []
+        for error in data.get("errors") or []:
+            path = error.get("path") or []
+            alias = next((part for part in path if part in variables and part != "accountId"), None)
+            if alias:
+                alias_errors.setdefault(alias, []).append(error.get("message", error))
+            else:
+                shared_errors.append(error.get("message", error))
+
+        account = ((data.get("data") or {}).get("actor") or {}).get("account") or {}
+
+        outcomes = []
+        for alias in aliases:
+            nrql = account.get(alias)
+            if alias in alias_errors:
+                outcomes.append({"results": [], "error": f"GraphQL errors: {alias_errors[alias]}"})
+            elif nrql is None:
+                outcomes.append({"results": [], "error": f"GraphQL errors: {shared_errors or 'no data returned'}"})
+            else:
+                outcomes.append({"results": nrql.get("results") or [], "error": None})
+
+        return outcomes
+
+    def _post_graphql(self, graphql_query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST a GraphQL document and return the ``account`` object.
 
+        Raises:
+            NerdGraphRateLimitError: NerdGraph answered 429
+            Exception: On transport or GraphQL errors
+        """
+        try:
+            response = get_transport().post(
+                self.graphql_endpoint,
+                json_body={"query": graphql_query, "variables": variables},
+                headers=self.headers
+            )
+            _raise_for_rate_limit(response)
+            response.raise_for_status()
+            data = load_response(response)
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to execute NRQL query: {str(e)}")
 
+        if "errors" in data:
+            raise Exception(f"GraphQL errors: {data['errors']}")
+
+        return ((data.get("data") or {}).get("actor") or {}).get("account") or {}
+
+    def execute_nrql_query_async(
+        self,
+        query: str,
+        deadline_seconds: Optional[float] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Execute a long-running NRQL query with NerdGraph's asynchronous mode.
+
+        The query is submitted with ``async: true``; if it has not finished
+        within NerdGraph's own timeout, ``nrqlQueryProgress`` is polled with
+        backoff (honouring ``retryAfter``) until it completes or the deadline
+        passes, instead of failing on the HTTP request timeout.
+
+        Args:
+            query: The NRQL query to execute
+            deadline_seconds: Give up waiting after this long (default: Config.NRQL_ASYNC_DEADLINE_SECONDS)
+            use_cache: Consult the result cache (default: True)
+
+        Returns:
+            Query results as a dictionary. If the deadline passed first, the
+            result has ``"partial": True`` and whatever results NerdGraph had
+            returned so far (possibly none).
+        """
+        if use_cache and self.cache is not None:
+            cached = self.cache.get(query)
+            if cached is not None:
+                return cached
+
+        deadline_seconds = deadline_seconds if deadline_seconds is not None else Config.NRQL_ASYNC_DEADLINE_SECONDS
+        deadline = time.monotonic() + deadline_seconds
+
+        progress_fields = """
+                  queryProgress {
+                    queryId
+                    completed
+                    retryAfter
+                    retryDeadline
+                  }
+        """
+
+        submit_query = f"""
+        query($accountId: Int!, $nrql: Nrql!, $timeout: Seconds) {{
+          actor {{
+            account(id: $accountId) {{
+              nrql(query: $nrql, async: true, timeout: $timeout) {{
+                results
+{progress_fields}
+              }}
+            }}
+          }}
+        }}
+        """
+
+        poll_query = f"""
+        query($accountId: Int!, $queryId: ID!) {{
+          actor {{
+            account(id: $accountId) {{
+              nrqlQueryProgress(queryId: $queryId) {{
+                results
+{progress_fields}
+              }}
+            }}
+          }}
+        }}
+        """
+
+        account = self._post_graphql(submit_query, {
+            "accountId": int(self.account_id),
+            "nrql": query,
+            "timeout": int(Config.NRQL_ASYNC_SUBMIT_TIMEOUT_SECONDS)
+        })
+        nrql = account.get("nrql") or {}
+        progress = nrql.get("queryProgress") or {}
+        backoff = 1.0
+
+        while progress.get("queryId") and not progress.get("completed"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"  ⚠️  Async NRQL query {progress.get('queryId')} still running at deadline - returning partial results")
+                return {"results": nrql.get("results") or [], "partial": True, "queryId": progress.get("queryId")}
+
+            delay = progress.get("retryAfter") or backoff
+            time.sleep(min(float(delay), remaining))
+            backoff = min(backoff * 2, 30.0)
+
+            account = self._post_graphql(poll_query, {
+                "accountId": int(self.account_id),
+                "queryId": progress["queryId"]
+            })
+            nrql = account.get("nrqlQueryProgress") or {}
+            progress = nrql.get("queryProgress") or {}
+
+        result = {"results": nrql.get("results") or []}
+        if use_cache and self.cache is not None:
+            self.cache.put(query, result)
+        return result
+
     def get_alert_analysis(self, start_time: Optional[str] = None, end_time: Optional[str] = None) -> Dict[str, Any]:
         """
         Execute the analysis query to get affected users and companies.
@@ -97,59 +387,38 @@ class NewRelicClient:
 
         return self.execute_nrql_query(query)
 
-    def parse_faceted_results(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def parse_faceted_results(self, results: Union[Dict[str, Any], Iterable[Dict[str, Any]]]) -> FacetedResult:
         """
-        Parse faceted NRQL results into a structured format.
+        Parse faceted NRQL results into a columnar result.
 
         Args:
-            results: Raw NRQL query results
+            results: Raw NRQL query results, or an iterable of result rows
+                (e.g. from iter_nrql_results)
 
         Returns:
-            List of parsed results with company_id, email, and count
+            FacetedResult with company_id and email columns and error_count values
         """
-        parsed_data = []
-
-        raw_results = results.get("results", [])
+        raw_results = results.get("results", []) if isinstance(results, dict) else results
 
-        for item in raw_results:
-            # Extract facet values
-            facet = item.get("facet", [])
-            count = item.get("count", 0)
+        # Facet should contain [USER_COMPANY_ID, USER_EMAIL_ID]
+        rows = (item for item in raw_results if len(item.get("facet") or []) >= 2)
 
-            # Facet should contain [USER_COMPANY_ID, USER_EMAIL_ID]
-            if len(facet) >= 2:
-                company_id = facet[0]
-                email = facet[1]
+        return FacetedResult.from_rows(rows, ["company_id", "email"], value_name="error_count")
 
-                parsed_data.append({
-                    "company_id": company_id,
-                    "email": email,
-                    "error_count": count
-                })
-
-        # Sort by error count (descending)
-        parsed_data.sort(key=lambda x: x["error_count"], reverse=True)
-
-        return parsed_data
-
-    def format_alert_data(self, analysis_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def format_alert_data(self, analysis_results: FacetedResult) -> Dict[str, Any]:
         """
         Format analysis results into a structured alert data.
 
         Args:
-            analysis_results: Parsed analysis results
+            analysis_results: Parsed analysis results (see parse_faceted_results)
 
         Returns:
             Formatted alert data
         """
-        total_errors = sum(item["error_count"] for item in analysis_results)
-        affected_users = len(analysis_results)
-        affected_companies = len(set(item["company_id"] for item in analysis_results))
-
         return {
-            "total_errors": total_errors,
-            "affected_users": affected_users,
-            "affected_companies": affected_companies,
-            "top_affected": analysis_results[:10],  # Top 10 affected users
-            "all_affected": analysis_results
+            "total_errors": analysis_results.total(),
+            "affected_users": len(analysis_results),
+            "affected_companies": analysis_results.distinct_count("company_id"),
+            "top_affected": analysis_results.top_records(10),  # Top 10 affected users
+            "all_affected": analysis_results.records()
         }
@@ -0,0 +1,241 @@
+"""
+Two-tier (memory + disk) TTL cache for NRQL query results.
+
+Keys are the normalized NRQL text plus a time bucket, so a relative query
+such as ``SINCE 7 days ago`` is reused within its bucket and rolls over
+automatically, while queries with an absolute time range are cached for
+longer. The memory tier is an LRU bounded by bytes; the SQLite disk tier is
+shared between processes (run_summary.py, main.py, langgraph dev), so repeat
+runs within a few minutes do not touch the network.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from config import Config
+
+
+_ABSOLUTE_RANGE = re.compile(r"\bSINCE\s+('[^']*'|\d+)\s+UNTIL\s+('[^']*'|\d+)", re.IGNORECASE)
+_RELATIVE_RANGE = re.compile(r"\b(SINCE|UNTIL)\b[^']*?\bAGO\b", re.IGNORECASE)
+
+
+def normalize_nrql(query: str) -> str:
+    """Collapse whitespace so formatting differences map to the same key."""
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def classify_nrql(query: str) -> str:
+    """
+    Classify a query for TTL purposes.
+
+    Returns:
+        "absolute" for fixed SINCE/UNTIL timestamps, "relative" for ``... ago``
+        windows, otherwise "default"
+    """
+    if _ABSOLUTE_RANGE.search(query) and not _RELATIVE_RANGE.search(query):
+        return "absolute"
+    if _RELATIVE_RANGE.search(query) or re.search(r"\bSINCE\b", query, re.IGNORECASE):
+        return "relative"
+    return "default"
+
+
+class NrqlResultCache:
+    """Memory + SQLite cache of NerdGraph ``nrql`` results with per-class TTLs."""
+
+    def __init__(
+        self,
+        disk_path: Optional[str],
+        ttls: Dict[str, float],
+        memory_max_bytes: int = 32 * 1024 * 1024,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        namespace: str = ""
+    ):
+        """
+        Args:
+            disk_path: SQLite file for the disk tier (None disables it)
+            ttls: TTL in seconds per query class ("absolute", "relative", "default");
+                a TTL of 0 disables caching for that class
+            memory_max_bytes: Size bound of the in-memory LRU tier
+            disk_max_bytes: Size bound of the disk tier
+            namespace: Extra key component (e.g. account ID)
+        """
+        self.ttls = ttls
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.namespace = namespace
+
+        self._memory = OrderedDict()  # key -> (expires_at, value, size)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._conn = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False, timeout=5)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS nrql_cache ("
+                "cache_key TEXT PRIMARY KEY, expires_at REAL NOT NULL, "
+                "last_access REAL NOT NULL, size INTEGER NOT NULL, value TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_nrql_cache_access ON nrql_cache(last_access)")
+            self._conn.commit()
+
+    def _key(self, query: str, now: float) -> Optional[str]:
+        """Build the cache key, or None if the query class is not cacheable."""
+        query_class = classify_nrql(query)
+        ttl = self.ttls.get(query_class, 0)
+        if ttl <= 0:
+            return None
+        # Relative windows move with the clock: bucket the key by TTL so a
+        # cached "SINCE 7 days ago" result is never served past its window
+        bucket = int(now // ttl) if query_class != "absolute" else 0
+        raw = f"{self.namespace}|{bucket}|{normalize_nrql(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            query: NRQL query
+
+        Returns:
+            The cached ``nrql`` result, or None on a miss
+        """
+        now = time.time()
+        key = self._key(query, now)
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._metrics["memory_hits"] += 1
+                    return json.loads(entry[1])
+                self._drop_memory(key)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT expires_at, value FROM nrql_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    self._conn.execute("UPDATE nrql_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+                    self._conn.commit()
+                    self._store_memory(key, row[0], row[1])
+                    self._metrics["disk_hits"] += 1
+                    return json.loads(row[1])
+
+            self._metrics["misses"] += 1
+            return None
+
+    def put(self, query: str, result: Dict[str, Any]):
+        """
+        Store a successful result.
+
+        Args:
+            query: NRQL query
+            result: NerdGraph ``nrql`` result
+        """
+        now = time.time()
+        key = self._key(query, now)
+        if key is None:
+            return
+
+        expires_at = now + self.ttls[classify_nrql(query)]
+        value = json.dumps(result, separators=(",", ":"))
+
+        with self._lock:
+            self._store_memory(key, expires_at, value)
+            self._metrics["stores"] += 1
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO nrql_cache (cache_key, expires_at, last_access, size, value) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, expires_at, now, len(value), value)
+                )
+                self._evict_disk(now)
+                self._conn.commit()
+
+    def _store_memory(self, key: str, expires_at: float, value: str):
+        if key in self._memory:
+            self._drop_memory(key)
+        size = len(value)
+        if size > self.memory_max_bytes:
+            return
+        self._memory[key] = (expires_at, value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+            self._metrics["evictions"] += 1
+
+    def _drop_memory(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+    def _evict_disk(self, now: float):
+        """Delete expired rows, then least recently used rows beyond the size bound."""
+        self._conn.execute("DELETE FROM nrql_cache WHERE expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM nrql_cache").fetchone()[0]
+        if total <= self.disk_max_bytes:
+            return
+        freed = 0
+        for cache_key, size in self._conn.execute(
+            "SELECT cache_key, size FROM nrql_cache ORDER BY last_access"
+        ).fetchall():
+            if total - freed <= self.disk_max_bytes:
+                break
+            self._conn.execute("DELETE FROM nrql_cache WHERE cache_key = ?", (cache_key,))
+            freed += size
+            self._metrics["evictions"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Cache hit/miss metrics.
+
+        Returns:
+            Counters plus ``hit_rate`` and current memory tier size
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            lookups = metrics["memory_hits"] + metrics["disk_hits"] + metrics["misses"]
+            metrics["hit_rate"] = round((metrics["memory_hits"] + metrics["disk_hits"]) / lookups, 3) if lookups else 0.0
+            metrics["memory_bytes"] = self._memory_bytes
+            metrics["memory_entries"] = len(self._memory)
+            return metrics
+
+
+_cache: Optional[NrqlResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_nrql_cache() -> Optional[NrqlResultCache]:
+    """Get the process-wide NRQL result cache, or None when NRQL_CACHE_ENABLED is off."""
+    global _cache
+    if not Config.NRQL_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = NrqlResultCache(
+                    disk_path=os.path.join(Config.STATE_DIR, "nrql_cache.db") if Config.NRQL_CACHE_DISK else None,
+                    ttls={
+                        "absolute": Config.NRQL_CACHE_TTL_ABSOLUTE_SECONDS,
+                        "relative": Config.NRQL_CACHE_TTL_RELATIVE_SECONDS,
+                        "default": Config.NRQL_CACHE_TTL_DEFAULT_SECONDS
+                    },
+                    memory_max_bytes=Config.NRQL_CACHE_MEMORY_MB * 1024 * 1024,
+                    disk_max_bytes=Config.NRQL_CACHE_DISK_MB * 1024 * 1024,
+                    namespace=str(Config.NEW_RELIC_ACCOUNT_ID)
+                )
+    return _cache
@@ -0,0 +1,339 @@
+"""
+Concurrent NRQL execution engine.
+
+Independent NRQL queries are submitted to a shared thread pool and collected
+as futures, so a summary run takes as long as its slowest query rather than
+the sum of all of them. A global token bucket and concurrency cap keep the
+process within NerdGraph limits, and 429 responses are retried after their
+Retry-After delay.
+"""
+import re
+import json
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from config import Config
+from newrelic_client import NewRelicClient, NerdGraphRateLimitError
+
+
+# Placeholder for the SINCE/UNTIL clause in NRQL templates
+TIME_RANGE = "{time_range}"
+
+
+def fill_time_range(template: str, start: int, end: int) -> str:
+    """
+    Substitute an absolute time range into an NRQL template.
+
+    Args:
+        template: NRQL containing ``{time_range}``
+        start: Range start in epoch seconds
+        end: Range end in epoch seconds
+
+    Returns:
+        NRQL with ``SINCE <start ms> UNTIL <end ms>``
+    """
+    return template.replace(TIME_RANGE, f"SINCE {int(start) * 1000} UNTIL {int(end) * 1000}")
+
+
+def nrql_limit(query: str) -> Optional[int]:
+    """Numeric LIMIT of an NRQL query, or None if it has none (or LIMIT MAX)."""
+    match = re.search(r"\bLIMIT\s+(\d+)", query, re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+
+def json_key(value: Any) -> str:
+    """Hashable key for a facet value (string or list)."""
+    return json.dumps(value, sort_keys=True)
+
+
+def is_truncated(rows: List[Dict[str, Any]], limit: Optional[int]) -> bool:
+    """
+    Whether FACET results may have been cut off by LIMIT.
+
+    Counts distinct facets rather than rows, since TIMESERIES results have
+    one row per facet per bucket.
+    """
+    return limit is not None and len({json_key(row.get("facet")) for row in rows}) >= limit
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter."""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_second: Tokens added per second (0 disables rate limiting)
+            capacity: Maximum burst size (default: max(1, rate_per_second))
+        """
+        self.rate = rate_per_second
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class NrqlExecutor:
+    """Runs NRQL queries on a thread pool behind a global rate/concurrency limiter."""
+
+    def __init__(
+        self,
+        client: Optional[NewRelicClient] = None,
+        max_workers: int = 8,
+        max_concurrency: int = 5,
+        rate_per_second: float = 10.0,
+        max_retries: int = 3,
+        share_seconds: float = 60.0
+    ):
+        """
+        Args:
+            client: NerdGraph client (default: a new NewRelicClient)
+            max_workers: Thread pool size
+            max_concurrency: Maximum NerdGraph requests in flight at once
+            rate_per_second: Maximum NerdGraph requests started per second
+            max_retries: Retries after a 429 response before giving up
+            share_seconds: How long a completed query's future is handed to
+                callers submitting the same query again
+        """
+        self.client = client or NewRelicClient()
+        self.max_retries = max_retries
+        self.share_seconds = share_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nrql")
+        self._concurrency = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._bucket = TokenBucket(rate_per_second)
+        self._shared: Dict[str, tuple] = {}  # normalized query -> (future, submitted_at)
+        self._shared_lock = threading.Lock()
+
+    def _call(self, fn: Callable[..., Any], *args) -> Any:
+        """Run one NerdGraph call under the limiter, retrying on 429."""
+        attempt = 0
+        while True:
+            self._bucket.acquire()
+            with self._concurrency:
+                try:
+                    return fn(*args)
+                except NerdGraphRateLimitError as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = e.retry_after if e.retry_after is not None else 2 ** attempt
+            attempt += 1
+            print(f"  ⏳ NerdGraph rate limited - retrying in {delay:g}s")
+            time.sleep(delay)
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return re.sub(r"\s+", " ", query).strip()
+
+    def submit(self, query: str, long_running: bool = False) -> Future:
+        """
+        Submit a NRQL query and return a future for its NerdGraph ``nrql`` result.
+
+        Long-running queries use NerdGraph's async mode (progress polling with
+        a deadline) when NRQL_ASYNC_ENABLED is set.
+
+        Identical queries submitted within ``share_seconds`` share one future
+        (unless it failed), so a node can prefetch a query that a later node
+        will ask for again.
+
+        Args:
+            query: NRQL query
+            long_running: Query may exceed the synchronous NerdGraph timeout
+
+        Returns:
+            Future resolving to the execute_nrql_query result
+        """
+        if long_running and Config.NRQL_ASYNC_ENABLED:
+            return self._share(self._normalize(query), self._call, self.client.execute_nrql_query_async, query)
+        return self._share(self._normalize(query), self._call, self.client.execute_nrql_query, query)
+
+    def submit_stream(self, query: str, consume: Callable[[Iterator[Dict[str, Any]]], Any]) -> Future:
+        """
+        Submit a NRQL query whose result rows are folded by ``consume`` as they are decoded.
+
+        Rows go straight from the streaming decoder into ``consume``, so a
+        large FACET result is never held as a list of row dicts. A cached
+        result is fed to ``consume`` instead of re-running the query.
+        Submissions of the same query and ``consume`` share one future, as
+        in submit.
+
+        Args:
+            query: NRQL query
+            consume: Function reducing an iterator of result rows to a value
+
+        Returns:
+            Future resolving to ``consume``'s return value
+        """
+        key = f"{self._normalize(query)}\0{consume.__module__}.{consume.__qualname__}"
+        return self._share(key, self._call, self._consume_rows, query, consume)
+
+    def _consume_rows(self, query: str, consume: Callable[[Iterator[Dict[str, Any]]], Any]) -> Any:
+        """Feed cached or streamed result rows of a query to ``consume``."""
+        cached = self.client.cache.get(query) if self.client.cache is not None else None
+        if cached is not None:
+            return consume(iter(cached.get("results") or []))
+        return consume(self.client.iter_nrql_results(query))
+
+    def _share(self, key: str, fn: Callable[..., Any], *args) -> Future:
+        """Submit ``fn(*args)`` to the pool, or return a live future already submitted under ``key``."""
+        now = time.monotonic()
+        with self._shared_lock:
+            for stale_key in [k for k, (_, at) in self._shared.items() if now - at > self.share_seconds]:
+                del self._shared[stale_key]
+
+            shared = self._shared.get(key)
+            if shared is not None:
+                future = shared[0]
+                if not (future.done() and future.exception() is not None):
+                    return future
+
+            future = self._pool.submit(fn, *args)
+            self._shared[key] = (future, now)
+        return future
+
+    def submit_batch(self, queries: List[str], batch_size: Optional[int] = None) -> List[Future]:
+        """
+        Submit queries as aliased batches, one future per batch, running in parallel.
+
+        Args:
+            queries: NRQL queries
+            batch_size: Maximum queries per request (default: Config.NRQL_BATCH_SIZE)
+
+        Returns:
+            Futures resolving to lists of execute_nrql_batch outcomes, in input order
+        """
+        batch_size = max(1, batch_size or Config.NRQL_BATCH_SIZE)
+        return [
+            self._pool.submit(self._call, self.client.execute_nrql_batch, queries[start:start + batch_size], batch_size)
+            for start in range(0, len(queries), batch_size)
+        ]
+
+    def run_batch(self, queries: List[str], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Execute queries as parallel aliased batches and collect the outcomes.
+
+        Args:
+            queries: NRQL queries
+            batch_size: Maximum queries per request (default: Config.NRQL_BATCH_SIZE)
+
+        Returns:
+            One execute_nrql_batch outcome per query, in input order
+        """
+        outcomes = []
+        chunk_size = max(1, batch_size or Config.NRQL_BATCH_SIZE)
+        for index, future in enumerate(self.submit_batch(queries, batch_size)):
+            try:
+                outcomes.extend(future.result())
+            except Exception as e:
+                chunk = queries[index * chunk_size:(index + 1) * chunk_size]
+                outcomes.extend({"results": [], "error": str(e)} for _ in chunk)
+        return outcomes
+
+    def run_complete(
+        self,
+        template: str,
+        start: int,
+        end: int,
+        align: int = 60,
+        long_running: bool = False,
+        max_depth: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a FACET count query and split it until no part is truncated by LIMIT.
+
+        If a (sub)range returns as many distinct facets as its LIMIT, the
+        result may be missing facets, so the range is halved and both halves
+        are re-run in parallel, recursively. Results are merged by summing
+        ``count`` per (facet, bucket), which is exact for additive aggregates
+        such as ``count(*)``.
+
+        Args:
+            template: NRQL with a ``{time_range}`` placeholder and a numeric LIMIT
+            start: Range start in epoch seconds
+            end: Range end in epoch seconds
+            align: Split points are multiples of this many seconds (use 3600
+                for TIMESERIES 1 hour so buckets are never cut)
+            long_running: Run sub-queries in async NRQL mode (see submit)
+            max_depth: Maximum number of halvings (default: Config.NRQL_SPLIT_MAX_DEPTH)
+
+        Returns:
+            Merged result rows
+
+        Raises:
+            Exception: If a sub-query fails or returns only partial (async) results
+        """
+        limit = nrql_limit(template)
+        max_depth = Config.NRQL_SPLIT_MAX_DEPTH if max_depth is None else max_depth
+
+        merged: Dict[tuple, Dict[str, Any]] = {}
+        pending = [(start, end, 0)]
+        while pending:
+            futures = [
+                (span, self.submit(fill_time_range(template, span[0], span[1]), long_running=long_running))
+                for span in pending
+            ]
+            pending = []
+
+            for (span_start, span_end, depth), future in futures:
+                nrql = future.result()
+                if nrql.get("partial"):
+                    # Callers may persist these counts; never merge half a range
+                    raise Exception("NRQL sub-query did not complete before its deadline")
+                rows = nrql.get("results") or []
+
+                truncated = is_truncated(rows, limit)
+                mid = (span_start + span_end) // 2 // align * align
+                if truncated and depth < max_depth and span_start < mid < span_end:
+                    pending.append((span_start, mid, depth + 1))
+                    pending.append((mid, span_end, depth + 1))
+                    continue
+
+                if truncated:
+                    print(f"  ⚠️  NRQL result still at LIMIT {limit} after {depth} splits - counts may be incomplete")
+
+                for row in rows:
+                    key = (json_key(row.get("facet")), row.get("beginTimeSeconds"))
+                    if key in merged:
+                        merged[key]["count"] = (merged[key].get("count") or 0) + (row.get("count") or 0)
+                    else:
+                        merged[key] = dict(row)
+
+        return list(merged.values())
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker threads."""
+        self._pool.shutdown(wait=wait)
+
+
+_executor: Optional[NrqlExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_nrql_executor() -> NrqlExecutor:
+    """Get the process-wide NRQL executor configured by NRQL_* settings."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = NrqlExecutor(
+                    max_workers=Config.NRQL_MAX_WORKERS,
+                    max_concurrency=Config.NRQL_MAX_CONCURRENCY,
+                    rate_per_second=Config.NRQL_RATE_PER_SECOND,
+                    max_retries=Config.NRQL_MAX_RETRIES,
+                    share_seconds=Config.NRQL_SHARE_SECONDS
+                )
+    return _executor
@@ -1,97 +1,172 @@
 """Nodes for NRQL-based incident analysis."""
-from typing import Dict, Any
-import requests
+import time
+from typing import Dict, Any, Iterable, List, Optional
 from datetime import datetime
 from agent_state import AgentState
 from config import Config
-from langchain_ibm import WatsonxLLM
+from faceted_result import FacetedResult
+from timeseries_analysis import describe_timeseries
+from nrql_executor import TIME_RANGE, get_nrql_executor, is_truncated, nrql_limit
+from rollup_store import fetch_rollup, prefetch_rollup
+from nrql_pushdown import condition_stats_queries, format_condition_stats, parse_condition_stats, recent_alerts_query
+from llm_registry import get_llm, invoke_parallel
+from llm_cache import get_llm_cache
+from run_budget import BudgetExceeded, ensure_deadline, has_budget, monotonic_deadline, run_within_budget, time_left
+from insight_signatures import condition_signature, get_insight_store
+from structured_insights import build_structured_prompt, extract_json_object, schema_errors, validate_insights
+
+
+# WatsonX model for summarization (client created on first use)
+SUMMARY_LLM_MODEL_ID = "ibm/granite-4-h-small"
+SUMMARY_LLM_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 2000,
+    "temperature": 0.7,
+    "top_k": 50,
+    "top_p": 1
+}
+
+# Most frequent jhire alert conditions over the past 7 days
+FREQUENT_CONDITIONS_NRQL = """
+SELECT count(*) 
+FROM NrAiIncident 
+WHERE policyName LIKE '%jhire%' 
+FACET conditionName, conditionId, entity.name 
+SINCE 7 days ago 
+LIMIT 50
+"""
+
+# Companies and users affected by jhire NullPointerExceptions over the past 7 days
+NULL_POINTER_NRQL = """
+SELECT count(*) 
+FROM TransactionError 
+WHERE appName='jhire' 
+AND error.class = 'java.lang.NullPointerException' 
+AND USER_EMAIL_ID!='wh-admin@jobvite-inc.com' 
+AND USER_EMAIL_ID != 'jvautometa+hire+engage+poweruser@gmail.com' 
+FACET USER_COMPANY_ID, USER_EMAIL_ID, error.class 
+SINCE 7 days ago
+LIMIT 50
+"""
+
+SEVEN_DAYS_SECONDS = 7 * 24 * 3600
+
+# Hourly rollup templates for the two queries above ({time_range} is filled in
+# with only the hours missing from the local rollup store)
+FREQUENT_CONDITIONS_ROLLUP_NRQL = """
+SELECT count(*) 
+FROM NrAiIncident 
+WHERE policyName LIKE '%jhire%' 
+FACET conditionName, conditionId, entity.name 
+{time_range} 
+TIMESERIES 1 hour 
+LIMIT 50
+"""
+
+NULL_POINTER_ROLLUP_NRQL = """
+SELECT count(*) 
+FROM TransactionError 
+WHERE appName='jhire' 
+AND error.class = 'java.lang.NullPointerException' 
+AND USER_EMAIL_ID!='wh-admin@jobvite-inc.com' 
+AND USER_EMAIL_ID != 'jvautometa+hire+engage+poweruser@gmail.com' 
+FACET USER_COMPANY_ID, USER_EMAIL_ID, error.class 
+{time_range} 
+TIMESERIES 1 hour 
+LIMIT 50
+"""
+
+
+def _run_untruncated(query: str, long_running: bool = False) -> Dict[str, Any]:
+    """
+    Run a ``SINCE 7 days ago`` FACET query, re-running it over split time
+    ranges if the single query came back at its LIMIT.
 
+    Args:
+        query: NRQL containing ``SINCE 7 days ago``
+        long_running: Run in async NRQL mode (see NrqlExecutor.submit)
 
-# Initialize WatsonX LLM for summarization
-llm = WatsonxLLM(
-    model_id="ibm/granite-4-h-small",
-    url=Config.WATSONX_URL,
-    apikey=Config.WATSONX_APIKEY,
-    project_id=Config.WATSONX_PROJECT_ID,
-    params={
-        "decoding_method": "greedy",
-        "max_new_tokens": 2000,
-        "temperature": 0.7,
-        "top_k": 50,
-        "top_p": 1
-    }
-)
+    Returns:
+        NerdGraph ``nrql`` result (merged across sub-ranges if it was split)
+    """
+    executor = get_nrql_executor()
+    nrql = executor.submit(query, long_running=long_running).result()
+    if nrql.get("partial") or not is_truncated(nrql.get("results", []), nrql_limit(query)):
+        return nrql
 
+    return {"results": _run_split(query, long_running=long_running)}
 
-def fetch_frequent_conditions_node(state: AgentState) -> AgentState:
-    """Fetch most frequent conditions using NRQL."""
-    print("🔍 Fetching most frequent conditions from past 7 days...")
 
-    state["current_step"] = "fetch_frequent_conditions"
+def _run_split(query: str, long_running: bool = False) -> List[Dict[str, Any]]:
+    """Re-run a ``SINCE 7 days ago`` FACET query that hit its LIMIT over split time ranges."""
+    print(f"  🔀 NRQL result hit LIMIT {nrql_limit(query)} - splitting the time range")
+    end = int(time.time() // 60) * 60
+    template = query.replace("SINCE 7 days ago", TIME_RANGE)
+    return get_nrql_executor().run_complete(template, end - SEVEN_DAYS_SECONDS, end, long_running=long_running)
+
+
+def _fetch_frequent_conditions_results():
+    """Run the 7-day frequent-conditions aggregate (incrementally when rollups are enabled)."""
+    executor = get_nrql_executor()
+    if Config.ROLLUPS_ENABLED:
+        return fetch_rollup("frequent_conditions", FREQUENT_CONDITIONS_ROLLUP_NRQL, executor)
+    return _run_untruncated(FREQUENT_CONDITIONS_NRQL).get("results", [])
+
+
+def _null_pointer_users(rows: Iterable[Dict[str, Any]]) -> FacetedResult:
+    """Fold NullPointerException facet rows into the affected-users table."""
+    # FACET order: USER_COMPANY_ID, USER_EMAIL_ID, error.class
+    return FacetedResult.from_rows(rows, ["company_id", "email", "error_class"], value_name="error_count")
+
 
-    nrql_query = """
-    SELECT count(*) 
-    FROM NrAiIncident 
-    WHERE policyName LIKE '%jhire%' 
-    FACET conditionName, conditionId, entity.name 
-    SINCE 7 days ago 
-    LIMIT 50
+def _fetch_null_pointer_users() -> FacetedResult:
     """
+    Run the 7-day NullPointerException facet aggregate (incrementally when rollups are enabled).
 
-    graphql_query = """
-    query($accountId: Int!, $nrqlQuery: Nrql!) {
-        actor {
-            account(id: $accountId) {
-                nrql(query: $nrqlQuery) {
-                    results
-                }
-            }
-        }
-    }
+    The plain query's rows are streamed from the response straight into the
+    facet table; it is only re-run over split time ranges if it hit its LIMIT.
     """
+    executor = get_nrql_executor()
+    if Config.ROLLUPS_ENABLED:
+        return _null_pointer_users(
+            fetch_rollup("null_pointer_users", NULL_POINTER_ROLLUP_NRQL, executor, long_running=True)
+        )
 
-    payload = {
-        "query": graphql_query,
-        "variables": {
-            "accountId": int(Config.NEW_RELIC_ACCOUNT_ID),
-            "nrqlQuery": nrql_query
-        }
-    }
+    if Config.NRQL_ASYNC_ENABLED:
+        # Async mode polls for a whole (possibly partial) result, so there is nothing to stream
+        nrql = _run_untruncated(NULL_POINTER_NRQL, long_running=True)
+        if nrql.get("partial"):
+            print("  ⚠️  NullPointerException facet query hit its deadline - impact numbers are partial")
+        return _null_pointer_users(nrql.get("results", []))
+
+    affected_users = executor.submit_stream(NULL_POINTER_NRQL, _null_pointer_users).result()
+    if len(affected_users) < nrql_limit(NULL_POINTER_NRQL):
+        return affected_users
+    return _null_pointer_users(_run_split(NULL_POINTER_NRQL, long_running=True))
+
+
+def fetch_frequent_conditions_node(state: AgentState) -> AgentState:
+    """Fetch most frequent conditions using NRQL."""
+    print("🔍 Fetching most frequent conditions from past 7 days...")
+
+    state["current_step"] = "fetch_frequent_conditions"
+    ensure_deadline(state)
 
     try:
-        response = requests.post(
-            Config.GRAPHQL_ENDPOINT,
-            headers={
-                "API-Key": Config.NEW_RELIC_API_KEY,
-                "Content-Type": "application/json"
-            },
-            json=payload,
-            timeout=30
+        results = run_within_budget(state, _fetch_frequent_conditions_results)
+
+        # Parse results - New Relic returns FACET fields as an array
+        # FACET order: conditionName, conditionId, entity.name
+        conditions = FacetedResult.from_rows(
+            results,
+            ["conditionName", "conditionId", "entity.name"],
+            defaults={"conditionId": None}
         )
-        response.raise_for_status()
 
-        data = response.json()
-        results = data.get("data", {}).get("actor", {}).get("account", {}).get("nrql", {}).get("results", [])
+        # Take top conditions by count (descending)
+        state["frequent_conditions"] = conditions.top_records(10)  # Top 10
 
-        # Parse results - New Relic returns FACET fields as an array
-        parsed_results = []
-        for result in results:
-            facet = result.get('facet', [])
-            # FACET order: conditionName, conditionId, entity.name
-            parsed_result = {
-                'conditionName': facet[0] if len(facet) > 0 else 'Unknown',
-                'conditionId': facet[1] if len(facet) > 1 else None,
-                'entity.name': facet[2] if len(facet) > 2 else 'Unknown',
-                'count': result.get('count', 0)
-            }
-            parsed_results.append(parsed_result)
-
-        # Sort by count (descending) and take top conditions
-        sorted_conditions = sorted(parsed_results, key=lambda x: x.get("count", 0), reverse=True)
-
-        state["frequent_conditions"] = sorted_conditions[:10]  # Top 10
-
-        print(f"✅ Found {len(sorted_conditions)} conditions, tracking top {len(state['frequent_conditions'])}")
+        print(f"✅ Found {len(conditions)} conditions, tracking top {len(state['frequent_conditions'])}")
         for i, cond in enumerate(state["frequent_conditions"][:5], 1):
             condition_name = cond.get('conditionName', 'Unknown')
             count = cond.get('count', 0)
@@ -110,7 +185,11 @@ def fetch_frequent_conditions_node(state: AgentState) -> AgentState:
         error_msg = f"Failed to fetch frequent conditions: {str(e)}"
         print(f"❌ {error_msg}")
         state["errors"].append(error_msg)
-        state["next_step"] = "end"
+        # Still notify so a missing analysis is visible in Slack
+        state["frequent_conditions"] = []
+        state["incidents_summary"] = f"Alert analysis could not be completed: {str(e)}"
+        state["key_insights"] = ["Manual review required", "Check New Relic dashboard for details"]
+        state["next_step"] = "send_notification"
 
     return state
 
@@ -124,6 +203,18 @@ def fetch_condition_details_node(state: AgentState) -> AgentState:
     frequent_conditions = state.get("frequent_conditions", [])
     condition_details = {}
 
+    # Fewer conditions when there is not enough time left to analyze all of them
+    if len(frequent_conditions) > 5 and not has_budget(state, 3 * Config.BUDGET_MIN_LLM_SECONDS):
+        print(f"⏱️  {time_left(state):.0f}s of run budget left - analyzing the top 5 conditions only")
+        frequent_conditions = frequent_conditions[:5]
+        state["frequent_conditions"] = frequent_conditions
+    enrich = has_budget(state, Config.BUDGET_MIN_ENRICHMENT_SECONDS)
+
+    # Build one projected query per condition plus three aggregate queries
+    # (durations, priorities, close causes) covering all of them; everything
+    # is sent as a single aliased request
+    queried_conditions = []
+    nrql_queries = []
     for condition in frequent_conditions:
         condition_id = condition.get("conditionId")
         condition_name = condition.get("conditionName", "Unknown")
@@ -132,75 +223,72 @@ def fetch_condition_details_node(state: AgentState) -> AgentState:
             continue
 
         # Query using conditionName since that's what works
-        nrql_query = f"""
-        SELECT * 
-        FROM NrAiIncident 
-        WHERE conditionName = '{condition_name}' 
-        SINCE 7 days ago 
-        LIMIT 5
-        """
-
-        graphql_query = """
-        query($accountId: Int!, $nrqlQuery: Nrql!) {
-            actor {
-                account(id: $accountId) {
-                    nrql(query: $nrqlQuery) {
-                        results
-                    }
-                }
-            }
-        }
-        """
-
-        payload = {
-            "query": graphql_query,
-            "variables": {
-                "accountId": int(Config.NEW_RELIC_ACCOUNT_ID),
-                "nrqlQuery": nrql_query
-            }
-        }
+        queried_conditions.append(condition)
+        nrql_queries.append(recent_alerts_query(condition_name))
 
-        try:
-            response = requests.post(
-                Config.GRAPHQL_ENDPOINT,
-                headers={
-                    "API-Key": Config.NEW_RELIC_API_KEY,
-                    "Content-Type": "application/json"
-                },
-                json=payload,
-                timeout=30
-            )
-            response.raise_for_status()
+    stats_queries = condition_stats_queries(
+        [condition.get("conditionName", "Unknown") for condition in queried_conditions]
+    ) if queried_conditions else []
 
-            data = response.json()
+    executor = get_nrql_executor()
 
-            # Check for errors in response
-            if "errors" in data:
-                error_msg = f"GraphQL errors: {data['errors']}"
-                print(f"  ⚠️  {error_msg}")
-                state["errors"].append(f"Failed to fetch details for condition {condition_id}: {error_msg}")
-                continue
+    # The NullPointerException facet query does not depend on these results;
+    # start it now so it runs in parallel with the detail batches
+    top_5_names = [cond.get('conditionName', '') for cond in frequent_conditions[:5]]
+    if "jhire Null Pointer Anomaly" in top_5_names and enrich:
+        if Config.ROLLUPS_ENABLED:
+            prefetch_rollup("null_pointer_users", NULL_POINTER_ROLLUP_NRQL, executor, long_running=True)
+        elif Config.NRQL_ASYNC_ENABLED:
+            executor.submit(NULL_POINTER_NRQL, long_running=True)
+        else:
+            executor.submit_stream(NULL_POINTER_NRQL, _null_pointer_users)
+
+    queries = nrql_queries + stats_queries
+    if not enrich:
+        print("⏱️  Run budget low - skipping recent alerts and statistics")
+        outcomes = [{"results": [], "error": None} for _ in queries]
+    else:
+        try:
+            outcomes = run_within_budget(state, executor.run_batch, queries)
+        except BudgetExceeded as e:
+            print(f"⏱️  {str(e)} - continuing without recent alerts and statistics")
+            state["errors"].append(f"Condition details skipped: {str(e)}")
+            outcomes = [{"results": [], "error": None} for _ in queries]
+    stats_outcomes = outcomes[len(nrql_queries):]
+    outcomes = outcomes[:len(nrql_queries)]
+
+    condition_stats = {}
+    if stats_outcomes:
+        for outcome in stats_outcomes:
+            if outcome["error"]:
+                print(f"  ⚠️  Failed to fetch condition statistics: {outcome['error']}")
+                state["errors"].append(f"Failed to fetch condition statistics: {outcome['error']}")
+        condition_stats = parse_condition_stats(*(outcome["results"] for outcome in stats_outcomes))
+
+    for condition, outcome in zip(queried_conditions, outcomes):
+        condition_id = condition.get("conditionId")
+        condition_name = condition.get("conditionName", "Unknown")
 
-            # Navigate the response
-            results = data.get("data", {}).get("actor", {}).get("account", {}).get("nrql", {}).get("results", [])
+        if outcome["error"]:
+            print(f"  ⚠️  Failed to fetch details for '{condition_name}': {outcome['error']}")
+            state["errors"].append(f"Failed to fetch details for condition {condition_id}: {outcome['error']}")
+            continue
 
-            condition_details[condition_name] = {
-                "condition_id": condition_id,
-                "occurrence_count": condition.get("count", 0),
-                "entity_name": condition.get("entity.name", "Unknown"),
-                "recent_alerts": results
-            }
+        results = outcome["results"]
 
-            print(f"  ✓ Fetched {len(results)} alerts for '{condition_name}'")
+        condition_details[condition_name] = {
+            "condition_id": condition_id,
+            "occurrence_count": condition.get("count", 0),
+            "entity_name": condition.get("entity.name", "Unknown"),
+            "recent_alerts": results,
+            "stats": condition_stats.get(condition_name, {})
+        }
 
-        except Exception as e:
-            print(f"  ⚠️  Failed to fetch details for '{condition_name}': {str(e)}")
-            state["errors"].append(f"Failed to fetch details for condition {condition_id}: {str(e)}")
+        print(f"  ✓ Fetched {len(results)} alerts for '{condition_name}'")
 
     state["condition_details"] = condition_details
 
     # Check if "jhire Null Pointer Anomaly" is in top 5 conditions
-    top_5_names = [cond.get('conditionName', '') for cond in frequent_conditions[:5]]
     if "jhire Null Pointer Anomaly" in top_5_names:
         print("🔍 Detected 'jhire Null Pointer Anomaly' in top 5 - fetching affected users and companies...")
         state["next_step"] = "fetch_null_pointer_details"
@@ -215,130 +303,80 @@ def fetch_null_pointer_details_node(state: AgentState) -> AgentState:
     print("🔍 Fetching affected companies and users for NullPointerException...")
 
     state["current_step"] = "fetch_null_pointer_details"
+    state["next_step"] = "summarize_conditions"
 
-    # NRQL query to get affected companies and users
-    nrql_query = """
-    SELECT count(*) 
-    FROM TransactionError 
-    WHERE appName='jhire' 
-    AND error.class = 'java.lang.NullPointerException' 
-    AND USER_EMAIL_ID!='wh-admin@jobvite-inc.com' 
-    AND USER_EMAIL_ID != 'jvautometa+hire+engage+poweruser@gmail.com' 
-    FACET USER_COMPANY_ID, USER_EMAIL_ID, error.class 
-    SINCE 7 days ago
-    LIMIT 50
-    """
+    if not has_budget(state, Config.BUDGET_MIN_ENRICHMENT_SECONDS):
+        print("⏱️  Run budget low - skipping affected user analysis")
+        return state
 
-    graphql_query = """
-    query($accountId: Int!, $nrqlQuery: Nrql!) {
-        actor {
-            account(id: $accountId) {
-                nrql(query: $nrqlQuery) {
-                    results
-                }
-            }
-        }
-    }
-    """
+    try:
+        # Usually already in flight - prefetched by fetch_condition_details_node
+        affected_users = run_within_budget(state, _fetch_null_pointer_users)
 
-    payload = {
-        "query": graphql_query,
-        "variables": {
-            "accountId": int(Config.NEW_RELIC_ACCOUNT_ID),
-            "nrqlQuery": nrql_query
-        }
-    }
+        # Get unique company count
+        unique_companies = affected_users.distinct_count("company_id", exclude=["Unknown"])
 
-    try:
-        response = requests.post(
-            Config.GRAPHQL_ENDPOINT,
-            headers={
-                "API-Key": Config.NEW_RELIC_API_KEY,
-                "Content-Type": "application/json"
-            },
-            json=payload,
-            timeout=30
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        results = data.get("data", {}).get("actor", {}).get("account", {}).get("nrql", {}).get("results", [])
-
-        # Parse the facet results
-        affected_users = []
-        for result in results:
-            facet = result.get('facet', [])
-            # FACET order: USER_COMPANY_ID, USER_EMAIL_ID, error.class
-            user_info = {
-                'company_id': facet[0] if len(facet) > 0 else 'Unknown',
-                'email': facet[1] if len(facet) > 1 else 'Unknown',
-                'error_class': facet[2] if len(facet) > 2 else 'Unknown',
-                'error_count': result.get('count', 0)
-            }
-            affected_users.append(user_info)
-
-        # Sort by error count (descending)
-        affected_users.sort(key=lambda x: x['error_count'], reverse=True)
+        # Total errors per company
+        top_companies = affected_users.group_by("company_id").top_records(5)
 
         # Store in condition_details
         condition_details = state.get("condition_details", {})
         if "jhire Null Pointer Anomaly" in condition_details:
-            condition_details["jhire Null Pointer Anomaly"]["affected_users"] = affected_users[:20]  # Top 20
+            condition_details["jhire Null Pointer Anomaly"]["affected_users"] = affected_users.top_records(20)  # Top 20
             condition_details["jhire Null Pointer Anomaly"]["total_affected_users"] = len(affected_users)
+            condition_details["jhire Null Pointer Anomaly"]["affected_companies_count"] = unique_companies
+            condition_details["jhire Null Pointer Anomaly"]["top_companies"] = top_companies
 
-            # Get unique company count
-            unique_companies = set(user['company_id'] for user in affected_users if user['company_id'] != 'Unknown')
-            condition_details["jhire Null Pointer Anomaly"]["affected_companies_count"] = len(unique_companies)
-
-        print(f"  ✓ Found {len(affected_users)} affected users across {len(unique_companies)} companies")
+        print(f"  ✓ Found {len(affected_users)} affected users across {unique_companies} companies")
 
     except Exception as e:
         print(f"  ⚠️  Failed to fetch NullPointerException details: {str(e)}")
         state["errors"].append(f"Failed to fetch NullPointerException details: {str(e)}")
 
-    state["next_step"] = "summarize_conditions"
-
     return state
 
 
-def summarize_conditions_node(state: AgentState) -> AgentState:
-    """Create AI-powered summary of frequent conditions and their alerts."""
-    print("🤖 Creating AI summary with IBM WatsonX Granite...")
+def _condition_alert_data(details: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Structured recent-alert data for AI analysis."""
+    alert_data = []
+    for alert in details.get('recent_alerts', []):
+        alert_info = {
+            'priority': alert.get('priority', 'Unknown'),
+            'duration_seconds': alert.get('durationSeconds', 0),
+            'close_cause': alert.get('closeCause', 'Unknown'),
+            'timestamp': alert.get('timestamp', 0),
+            'title': alert.get('title', 'No title')
+        }
+        alert_data.append(alert_info)
+    return alert_data
 
-    state["current_step"] = "summarize_conditions"
 
-    condition_details = state.get("condition_details", {})
+def _alerts_summary(details: Dict[str, Any]) -> str:
+    """One line per recent alert."""
+    return "\n".join([
+        f"- Alert {i+1}: Priority={a['priority']}, Duration={a['duration_seconds']}s, CloseCause={a['close_cause']}"
+        for i, a in enumerate(_condition_alert_data(details))
+    ])
 
-    # Generate AI insights for each condition based on their recent alerts
-    for cond_name, details in condition_details.items():
-        recent_alerts = details.get('recent_alerts', [])
 
-        if recent_alerts:
-            print(f"🧠 Analyzing alerts for '{cond_name}'...")
-
-            # Build structured alert data for AI analysis
-            alert_data = []
-            for alert in recent_alerts:
-                alert_info = {
-                    'priority': alert.get('priority', 'Unknown'),
-                    'duration_seconds': alert.get('durationSeconds', 0),
-                    'close_cause': alert.get('closeCause', 'Unknown'),
-                    'timestamp': alert.get('timestamp', 0),
-                    'title': alert.get('title', 'No title')
-                }
-                alert_data.append(alert_info)
-
-            # Create prompt for condition-specific insights
-            alerts_summary = "\n".join([
-                f"- Alert {i+1}: Priority={a['priority']}, Duration={a['duration_seconds']}s, CloseCause={a['close_cause']}"
-                for i, a in enumerate(alert_data)
-            ])
-
-            prompt = f"""Analyze these {len(recent_alerts)} recent alerts for condition "{cond_name}":
-
-{alerts_summary}
+def _condition_context(details: Dict[str, Any], spike_line: str = "") -> str:
+    """Alert data of one condition for the structured multi-condition prompt."""
+    return f"""Recent alerts:
+{_alerts_summary(details)}
+Total occurrences in past 7 days: {details.get('occurrence_count', 0)}
+7-day statistics:
+{format_condition_stats(details.get('stats') or {})}{spike_line}"""
+
+
+def _condition_prompt(cond_name: str, details: Dict[str, Any], spike_line: str = "") -> str:
+    """Build the condition-specific insight prompt."""
+    return f"""Analyze these {len(details.get('recent_alerts', []))} recent alerts for condition "{cond_name}":
+
+{_alerts_summary(details)}
 
 Total occurrences in past 7 days: {details.get('occurrence_count', 0)}
+7-day statistics:
+{format_condition_stats(details.get('stats') or {})}{spike_line}
 
 Provide a concise 3-4 sentence analysis covering:
 1. Pattern observed (frequency, severity trends)
@@ -348,34 +386,160 @@ Provide a concise 3-4 sentence analysis covering:
 
 Keep it professional and actionable for DevOps engineers."""
 
-            try:
-                ai_insight = llm.invoke(prompt)
-                insight_text = ai_insight if isinstance(ai_insight, str) else str(ai_insight)
 
-                # Clean up and limit length
-                insight_text = insight_text.strip()
-                if len(insight_text) > 500:
-                    insight_text = insight_text[:500] + "..."
+def _fallback_insight(details: Dict[str, Any]) -> str:
+    """Rule-based insight used when the LLM call for a condition fails."""
+    # Prefer the 7-day server-side aggregates
+    stats = details.get('stats') or {}
+    alert_data = _condition_alert_data(details)
+    avg_duration = stats.get('avg_duration_seconds')
+    if avg_duration is None:
+        avg_duration = sum(a['duration_seconds'] or 0 for a in alert_data) / len(alert_data) if alert_data else 0
+    priority_counts = dict(stats.get('priority_counts') or {})
+    if not priority_counts:
+        for a in alert_data:
+            p = a['priority']
+            priority_counts[p] = priority_counts.get(p, 0) + 1
+
+    fallback = f"This condition triggered {details.get('occurrence_count', 0)} times in the past 7 days. "
+    fallback += f"Alerts show average duration of {int(avg_duration//60)} minutes. "
+    fallback += f"Priority distribution: {', '.join([f'{k}={v}' for k,v in priority_counts.items()])}. "
+    fallback += "Review alert thresholds and consider investigating recurring patterns."
+    return fallback
+
+
+def _structured_insights(
+    llm,
+    cond_names: List[str],
+    contexts: List[str],
+    condition_details: Dict[str, Any],
+    deadline: Optional[float] = None
+) -> List[Any]:
+    """
+    Generate insights for several conditions with one JSON-producing LLM call.
+
+    Returns:
+        One insight per condition in input order, None where the response had
+        no valid entry (those are generated individually by the caller)
+    """
+    condition_ids = [str(condition_details[name]['condition_id']) for name in cond_names]
+    prompt = build_structured_prompt(list(zip(condition_ids, cond_names, contexts)))
+
+    print(f"🧠 Requesting structured insights for {len(cond_names)} conditions in one call...")
+    response = invoke_parallel(llm, [prompt], timeout=Config.LLM_CALL_TIMEOUT_SECONDS, deadline=deadline)[0]
+    if isinstance(response, Exception):
+        print(f"⚠️  Structured insight request failed: {str(response)}")
+        return [None] * len(cond_names)
 
-                details['ai_insight'] = insight_text
+    text = response if isinstance(response, str) else str(response)
+    data = extract_json_object(text)
+    for path, errors in schema_errors(data, condition_ids).items():
+        print(f"⚠️  Structured response rejected at {path}: {'; '.join(errors)}")
+    insights = validate_insights(data, condition_ids)
+    if len(insights) < len(condition_ids):
+        print(f"⚠️  Structured response covered {len(insights)}/{len(condition_ids)} conditions - generating the rest individually")
+    return [insights.get(condition_id) for condition_id in condition_ids]
 
-            except Exception as e:
-                print(f"⚠️  Failed to generate AI insight for '{cond_name}': {str(e)}")
-                # Fallback insight
-                avg_duration = sum(a['duration_seconds'] for a in alert_data) / len(alert_data) if alert_data else 0
-                priority_counts = {}
-                for a in alert_data:
-                    p = a['priority']
-                    priority_counts[p] = priority_counts.get(p, 0) + 1
 
-                fallback = f"This condition triggered {details.get('occurrence_count', 0)} times in the past 7 days. "
-                fallback += f"Recent alerts show average duration of {int(avg_duration//60)} minutes. "
-                fallback += f"Priority distribution: {', '.join([f'{k}={v}' for k,v in priority_counts.items()])}. "
-                fallback += "Review alert thresholds and consider investigating recurring patterns."
+def summarize_conditions_node(state: AgentState) -> AgentState:
+    """Create AI-powered summary of frequent conditions and their alerts."""
+    print("🤖 Creating AI summary with IBM WatsonX Granite...")
 
-                details['ai_insight'] = fallback
-        else:
+    state["current_step"] = "summarize_conditions"
+
+    condition_details = state.get("condition_details", {})
+
+    # Spike analysis of the incident that triggered this run, if any (the
+    # ALERT_QUERY series is the jhire NullPointerException error rate)
+    trigger_incident = state.get("trigger_incident") or {}
+    trigger_timeseries = describe_timeseries(trigger_incident.get("timeseries"))
+
+    # Generate AI insights for each condition based on its 7-day statistics
+    # and recent alerts; the LLM calls run concurrently and each condition
+    # falls back on its own if its call fails or times out. Conditions whose
+    # alert profile has not changed since the last run reuse that insight.
+    insight_store = get_insight_store()
+    analyzed = []
+    prompts = []
+    contexts = []
+    signatures = {}
+    for cond_name, details in condition_details.items():
+        if not details.get('recent_alerts'):
             details['ai_insight'] = "No recent alert data available for analysis."
+            continue
+
+        spike_line = ""
+        if trigger_timeseries and cond_name == "jhire Null Pointer Anomaly":
+            spike_line = f"\nCurrent error spike: {trigger_timeseries}"
+
+        if insight_store is not None:
+            signatures[cond_name] = condition_signature(details)
+            # A live spike is new information - always ask the LLM then
+            previous = None if spike_line else insight_store.reusable_insight(
+                details['condition_id'],
+                signatures[cond_name],
+                tolerance=Config.INSIGHT_SIGNATURE_TOLERANCE,
+                max_age_seconds=Config.INSIGHT_REUSE_MAX_AGE_SECONDS
+            )
+            if previous is not None:
+                print(f"♻️  Alert profile unchanged for '{cond_name}' - reusing previous insight")
+                details['ai_insight'] = previous
+                continue
+
+        print(f"🧠 Analyzing alerts for '{cond_name}'...")
+        analyzed.append(cond_name)
+        prompts.append(_condition_prompt(cond_name, details, spike_line))
+        contexts.append(_condition_context(details, spike_line))
+
+    responses = [None] * len(prompts)
+    if prompts and not has_budget(state, Config.BUDGET_MIN_LLM_SECONDS):
+        # No time for generations - use identical earlier responses, else rule-based insights
+        print(f"⏱️  {max(0, time_left(state)):.0f}s of run budget left - skipping LLM calls")
+        llm_cache = get_llm_cache()
+        for index, prompt in enumerate(prompts):
+            cached = llm_cache.get(SUMMARY_LLM_MODEL_ID, SUMMARY_LLM_PARAMS, prompt) if llm_cache is not None else None
+            responses[index] = cached if cached is not None else BudgetExceeded("Run budget too low for an LLM call")
+        prompts = []
+
+    deadline = monotonic_deadline(state)
+    try:
+        llm = get_llm(SUMMARY_LLM_MODEL_ID, SUMMARY_LLM_PARAMS) if prompts else None
+
+        # Optionally ask for all insights in one JSON response first
+        if Config.LLM_STRUCTURED_INSIGHTS and len(prompts) > 1:
+            responses = _structured_insights(llm, analyzed, contexts, condition_details, deadline)
+
+        # Per-condition calls for everything the structured response did not cover
+        missing = [index for index, response in enumerate(responses) if response is None]
+        for index, response in zip(missing, invoke_parallel(
+            llm,
+            [prompts[index] for index in missing],
+            max_workers=Config.LLM_MAX_CONCURRENCY,
+            timeout=Config.LLM_CALL_TIMEOUT_SECONDS,
+            deadline=deadline
+        )):
+            responses[index] = response
+    except Exception as e:
+        # Client could not be created - every condition falls back
+        responses = [e if response is None else response for response in responses]
+
+    for cond_name, response in zip(analyzed, responses):
+        details = condition_details[cond_name]
+        if isinstance(response, Exception):
+            print(f"⚠️  Failed to generate AI insight for '{cond_name}': {str(response)}")
+            details['ai_insight'] = _fallback_insight(details)
+            continue
+
+        insight_text = response if isinstance(response, str) else str(response)
+
+        # Clean up and limit length
+        insight_text = insight_text.strip()
+        if len(insight_text) > 500:
+            insight_text = insight_text[:500] + "..."
+
+        details['ai_insight'] = insight_text
+        if insight_store is not None:
+            insight_store.put(details['condition_id'], signatures[cond_name], insight_text)
 
     # Build structured summary
     summary_parts = [
@@ -383,12 +547,18 @@ Keep it professional and actionable for DevOps engineers."""
         f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
         f"Total Unique Conditions: {len(condition_details)}\n"
     ]
+    if trigger_timeseries:
+        summary_parts.append(f"Triggering Incident: {trigger_incident.get('title', 'Unknown')}")
+        summary_parts.append(f"Error Spike: {trigger_timeseries}\n")
 
     for i, (cond_name, details) in enumerate(condition_details.items(), 1):
         summary_parts.append(f"\n## {i}. {cond_name}")
         summary_parts.append(f"- **Occurrences**: {details['occurrence_count']}")
         summary_parts.append(f"- **Entity**: {details['entity_name']}")
         summary_parts.append(f"- **Condition ID**: {details['condition_id']}")
+        if details.get('stats'):
+            summary_parts.append(f"\n### 7-Day Statistics:")
+            summary_parts.append(format_condition_stats(details['stats']))
         summary_parts.append(f"\n### AI Analysis:")
         summary_parts.append(details.get('ai_insight', 'No insight available'))
 
@@ -0,0 +1,168 @@
+"""
+Server-side aggregation for per-condition alert statistics.
+
+Rather than pulling ``SELECT *`` rows for every condition and reducing them
+in Python, these queries let NRQL compute the duration percentiles, priority
+distribution and close-cause histogram for all conditions at once (one FACET
+per statistic), so only a few small rows per condition come back.
+"""
+from typing import Any, Dict, List
+
+
+# Columns the summary actually reads from individual incidents
+ALERT_COLUMNS = ["incidentId", "priority", "durationSeconds", "closeCause", "title"]
+
+DURATION_PERCENTILES = (50, 90, 99)
+
+
+def nrql_string(value: str) -> str:
+    """Quote a value as an NRQL string literal."""
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def recent_alerts_query(condition_name: str, limit: int = 5) -> str:
+    """
+    Latest incidents of one condition, projected to the columns the summary uses.
+
+    Args:
+        condition_name: Alert condition name
+        limit: Number of incidents
+
+    Returns:
+        NRQL query
+    """
+    return f"""
+    SELECT {', '.join(ALERT_COLUMNS)}
+    FROM NrAiIncident
+    WHERE conditionName = {nrql_string(condition_name)}
+    SINCE 7 days ago
+    LIMIT {limit}
+    """
+
+
+def condition_stats_queries(condition_names: List[str]) -> List[str]:
+    """
+    Aggregate queries covering every condition in one FACET each.
+
+    Args:
+        condition_names: Alert condition names
+
+    Returns:
+        [durations query, priority query, close-cause query]
+    """
+    names = ", ".join(nrql_string(name) for name in condition_names)
+    where = f"WHERE conditionName IN ({names})"
+    percentiles = ", ".join(str(p) for p in DURATION_PERCENTILES)
+    return [
+        f"""
+        SELECT uniqueCount(incidentId), average(durationSeconds), percentile(durationSeconds, {percentiles})
+        FROM NrAiIncident
+        {where}
+        FACET conditionName
+        SINCE 7 days ago
+        LIMIT MAX
+        """,
+        f"""
+        SELECT uniqueCount(incidentId)
+        FROM NrAiIncident
+        {where}
+        FACET conditionName, priority
+        SINCE 7 days ago
+        LIMIT MAX
+        """,
+        f"""
+        SELECT count(*)
+        FROM NrAiIncident
+        {where} AND event = 'close'
+        FACET conditionName, closeCause
+        SINCE 7 days ago
+        LIMIT MAX
+        """
+    ]
+
+
+def _facet(row: Dict[str, Any]) -> List[Any]:
+    facet = row.get("facet")
+    return facet if isinstance(facet, list) else [facet]
+
+
+def parse_condition_stats(
+    durations: List[Dict[str, Any]],
+    priorities: List[Dict[str, Any]],
+    close_causes: List[Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Combine the condition_stats_queries results per condition.
+
+    Args:
+        durations: Rows of the durations query
+        priorities: Rows of the priority query
+        close_causes: Rows of the close-cause query
+
+    Returns:
+        Mapping of condition name to {"incident_count", "avg_duration_seconds",
+        "duration_percentiles", "priority_counts", "close_cause_counts"};
+        ``incident_count`` is None when the durations query had no row for it
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+
+    def entry(name):
+        return stats.setdefault(name, {
+            "incident_count": None,
+            "avg_duration_seconds": None,
+            "duration_percentiles": {},
+            "priority_counts": {},
+            "close_cause_counts": {}
+        })
+
+    for row in durations:
+        item = entry(_facet(row)[0])
+        item["incident_count"] = row.get("uniqueCount.incidentId") or 0
+        item["avg_duration_seconds"] = row.get("average.durationSeconds")
+        item["duration_percentiles"] = {
+            str(p): value
+            for p, value in (row.get("percentile.durationSeconds") or {}).items()
+            if value is not None
+        }
+
+    for row in priorities:
+        facet = _facet(row)
+        priority = facet[1] if len(facet) > 1 and facet[1] is not None else "Unknown"
+        entry(facet[0])["priority_counts"][priority] = row.get("uniqueCount.incidentId") or 0
+
+    for row in close_causes:
+        facet = _facet(row)
+        cause = facet[1] if len(facet) > 1 and facet[1] is not None else "Unknown"
+        entry(facet[0])["close_cause_counts"][cause] = row.get("count") or 0
+
+    return stats
+
+
+def format_condition_stats(stats: Dict[str, Any]) -> str:
+    """
+    Render one condition's statistics as prompt/summary lines.
+
+    Args:
+        stats: One value of parse_condition_stats
+
+    Returns:
+        Multi-line text; statistics that were not fetched are left out rather
+        than reported as zero
+    """
+    lines = []
+    if stats.get("incident_count") is not None:
+        lines.append(f"- Distinct incidents: {stats['incident_count']}")
+    percentiles = stats.get("duration_percentiles") or {}
+    if percentiles:
+        lines.append("- Duration: " + ", ".join(
+            f"p{p}={int(percentiles[p])}s" for p in sorted(percentiles, key=float)
+        ))
+    if stats.get("priority_counts"):
+        lines.append("- Priority mix: " + ", ".join(
+            f"{k}={v}" for k, v in sorted(stats["priority_counts"].items(), key=lambda kv: -kv[1])
+        ))
+    if stats.get("close_cause_counts"):
+        lines.append("- Close causes: " + ", ".join(
+            f"{k}={v}" for k, v in sorted(stats["close_cause_counts"].items(), key=lambda kv: -kv[1])
+        ))
+    return "\n".join(lines) if lines else "- Not available"
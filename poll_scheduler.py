@@ -0,0 +1,123 @@
+"""
+Drift-free poll scheduling based on time.monotonic().
+
+Deadlines are laid on a fixed grid (start + k * interval) instead of sleeping
+``interval`` after each cycle, so the real period does not grow by the time
+spent polling. In adaptive mode the interval drops to the minimum while new
+incidents keep arriving and backs off exponentially while it is quiet.
+Jitter spreads several pollers apart without shifting the grid itself.
+"""
+import time
+import random
+from typing import Callable, Optional
+from config import Config
+
+
+class PollScheduler:
+    """Monotonic poll scheduler with optional adaptive interval and jitter."""
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        adaptive: bool = False,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        backoff_factor: float = 2.0,
+        jitter: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Args:
+            interval_seconds: Base poll period
+            adaptive: Shrink the period while busy and back off while quiet
+            min_interval: Fastest period in adaptive mode (default: interval_seconds)
+            max_interval: Slowest period in adaptive mode (default: interval_seconds)
+            backoff_factor: Multiplier applied to the period after a quiet cycle
+            jitter: Random offset applied to each wake-up, as a fraction of the period
+            clock: Monotonic clock (injectable for testing)
+            sleep: Sleep function (injectable for testing)
+        """
+        self.base_interval = float(interval_seconds)
+        self.adaptive = adaptive
+        self.min_interval = float(min_interval if min_interval is not None else interval_seconds)
+        self.max_interval = float(max_interval if max_interval is not None else interval_seconds)
+        self.backoff_factor = max(1.0, backoff_factor)
+        self.jitter = max(0.0, min(jitter, 0.5))
+        self.clock = clock
+        self.sleep = sleep
+
+        self.current_interval = self.base_interval
+        self._next_deadline = None
+        self.missed_ticks = 0
+
+    def start(self):
+        """Anchor the schedule at the current time."""
+        self._next_deadline = self.clock()
+
+    def record(self, found_new: bool):
+        """
+        Feed back the outcome of a poll cycle (adaptive mode only).
+
+        Args:
+            found_new: Whether the cycle found new incidents
+        """
+        if not self.adaptive:
+            return
+        if found_new:
+            self.current_interval = self.min_interval
+        else:
+            self.current_interval = min(self.current_interval * self.backoff_factor, self.max_interval)
+
+    def wait(self) -> float:
+        """
+        Sleep until the next scheduled poll.
+
+        If a cycle overran one or more periods, the missed ticks are skipped
+        rather than fired back to back.
+
+        Returns:
+            Seconds actually slept
+        """
+        if self._next_deadline is None:
+            self.start()
+
+        now = self.clock()
+        self._next_deadline += self.current_interval
+        if self._next_deadline <= now:
+            skipped = int((now - self._next_deadline) // self.current_interval) + 1
+            self.missed_ticks += skipped
+            self._next_deadline += skipped * self.current_interval
+
+        target = self._next_deadline
+        if self.jitter:
+            target += random.uniform(-self.jitter, self.jitter) * self.current_interval
+
+        delay = max(0.0, target - now)
+        if delay:
+            self.sleep(delay)
+        return delay
+
+
+def create_poll_scheduler(interval_seconds: float, adaptive: Optional[bool] = None) -> PollScheduler:
+    """
+    Create a poll scheduler from POLL_* settings.
+
+    Args:
+        interval_seconds: Base poll period
+        adaptive: Override Config.POLL_ADAPTIVE
+
+    Returns:
+        Configured scheduler
+    """
+    if adaptive is None:
+        adaptive = Config.POLL_ADAPTIVE
+
+    return PollScheduler(
+        interval_seconds=interval_seconds,
+        adaptive=adaptive,
+        min_interval=min(Config.POLL_MIN_INTERVAL_SECONDS, interval_seconds),
+        max_interval=max(Config.POLL_MAX_INTERVAL_SECONDS, interval_seconds),
+        backoff_factor=Config.POLL_BACKOFF_FACTOR,
+        jitter=Config.POLL_JITTER
+    )
@@ -4,12 +4,62 @@ and triggers the agent when new incidents are detected.
 
 No webhook needed - perfect for local development!
 """
+import re
 import sys
-from datetime import datetime, timedelta
+import math
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
 from alert_poller import create_poller
+from incident_workers import create_worker_pool, OVERFLOW_POLICIES
 from agent_graph import create_agent_graph
 from agent_state import AgentState
 from config import Config
+from nrql_executor import get_nrql_executor
+from timeseries_analysis import analyze_timeseries, describe_timeseries
+from run_budget import start_deadline, time_left
+
+
+# NRQL rejects TIMESERIES queries with more buckets than this
+MAX_TIMESERIES_BUCKETS = 366
+
+
+def _analyze_alert_timeseries(time_start: datetime, time_end: datetime, timeout: float = None):
+    """
+    Run ALERT_QUERY over the incident window and detect the error spike in it.
+
+    The bucket size is widened from ALERT_QUERY's 1 second as needed to stay
+    within NRQL's TIMESERIES bucket limit for the window.
+
+    Args:
+        time_start: Window start
+        time_end: Window end
+        timeout: Seconds to wait for the query (default: no limit)
+
+    Returns:
+        analyze_timeseries result, or None if there is no data
+
+    Raises:
+        concurrent.futures.TimeoutError: If the query did not finish within timeout
+    """
+    window = (
+        f"SINCE '{time_start.strftime('%Y-%m-%d %H:%M:%S +00:00')}' "
+        f"UNTIL '{time_end.strftime('%Y-%m-%d %H:%M:%S +00:00')}'"
+    )
+    window_seconds = (time_end - time_start).total_seconds()
+    bucket_seconds = max(1, math.ceil(window_seconds / MAX_TIMESERIES_BUCKETS))
+    query = re.sub(r"SINCE\s+'[^']*'\s+UNTIL\s+'[^']*'", window, Config.ALERT_QUERY)
+    query = re.sub(
+        r"TIMESERIES\s+\d+\s+\w+",
+        f"TIMESERIES {bucket_seconds} {'SECOND' if bucket_seconds == 1 else 'SECONDS'}",
+        query
+    )
+    nrql = get_nrql_executor().submit(query).result(timeout=timeout)
+    return analyze_timeseries(
+        nrql.get("results", []),
+        alpha=Config.TIMESERIES_EWMA_ALPHA,
+        window=Config.TIMESERIES_ZSCORE_WINDOW,
+        z_threshold=Config.TIMESERIES_ZSCORE_THRESHOLD
+    )
 
 
 def process_incident(incident: dict):
@@ -23,25 +73,47 @@ def process_incident(incident: dict):
     print("🤖 Processing Incident with Agent")
     print("="*60)
 
+    # The time-to-notify budget starts when processing of the incident starts
+    deadline = start_deadline()
+
     try:
         # Extract time window from incident
         opened_at = incident.get('openedAt')
         if opened_at:
-            # Parse timestamp and create time window
-            opened_time = datetime.fromisoformat(opened_at.replace('Z', '+00:00'))
+            # Parse timestamp (epoch ms from aiIssues, or ISO) and create time window
+            if isinstance(opened_at, (int, float)) or str(opened_at).isdigit():
+                opened_time = datetime.fromtimestamp(int(opened_at) / 1000, tz=timezone.utc)
+            else:
+                opened_time = datetime.fromisoformat(opened_at.replace('Z', '+00:00')).astimezone(timezone.utc)
             time_start = opened_time - timedelta(minutes=5)
             time_end = opened_time + timedelta(minutes=2)
         else:
             # Default to recent time window
-            time_end = datetime.now()
+            time_end = datetime.now(timezone.utc)
             time_start = time_end - timedelta(minutes=10)
 
+        # Attach the spike onset / peak rate so the LLM step can cite the impact
+        # window. This is optional enrichment: it gets a small share of the run
+        # budget and never the time the graph needs for its NRQL and LLM steps
+        spare_seconds = time_left({"deadline": deadline}) - Config.BUDGET_MIN_LLM_SECONDS
+        timeseries_timeout = min(spare_seconds, Config.TIMESERIES_BUDGET_SHARE * Config.TIME_TO_NOTIFY_SLO_SECONDS)
+        if Config.TIMESERIES_ANALYSIS_ENABLED and spare_seconds >= Config.BUDGET_MIN_ENRICHMENT_SECONDS:
+            try:
+                incident["timeseries"] = _analyze_alert_timeseries(time_start, time_end, timeout=timeseries_timeout)
+                if incident["timeseries"]:
+                    print(f"📈 {describe_timeseries(incident['timeseries'])}")
+            except FutureTimeoutError:
+                print(f"⏱️  Time-series analysis did not finish within {timeseries_timeout:.0f}s - skipping it")
+            except Exception as e:
+                print(f"⚠️  Time-series analysis failed: {str(e)}")
+
         # Create agent
         agent = create_agent_graph()
 
         # Create initial state
         initial_state: AgentState = {
             "alert_triggered": True,
+            "trigger_incident": incident,
             "alert_query": Config.ALERT_QUERY,
             "alert_time_start": time_start.strftime("%Y-%m-%d %H:%M:%S +00:00"),
             "alert_time_end": time_end.strftime("%Y-%m-%d %H:%M:%S +00:00"),
@@ -53,6 +125,7 @@ def process_incident(incident: dict):
             "slack_sent": False,
             "opsgenie_sent": False,
             "errors": [],
+            "deadline": deadline,
             "current_step": "init",
             "next_step": None
         }
@@ -88,14 +161,26 @@ def process_incident(incident: dict):
 
 def start_polling_server(
     poll_interval: int = 60,
-    condition_pattern: str = None
+    condition_pattern: str = None,
+    workers: int = None,
+    queue_size: int = None,
+    overflow_policy: str = None,
+    adaptive: bool = None
 ):
     """
     Start the polling server that continuously checks for alerts.
 
+    Polling and processing are decoupled: the poll loop only enqueues new
+    incidents and a pool of workers runs the agent graph, so slow LLM or
+    NRQL calls never delay the next poll.
+
     Args:
         poll_interval: Seconds between polls (default: 60)
         condition_pattern: Optional filter for condition names
+        workers: Number of worker threads (default: Config.WORKER_COUNT)
+        queue_size: Maximum queued incidents (default: Config.WORKER_QUEUE_SIZE)
+        overflow_policy: What to do when the queue is full (default: Config.WORKER_OVERFLOW_POLICY)
+        adaptive: Adapt the poll interval to incident activity (default: Config.POLL_ADAPTIVE)
     """
     print("="*60)
     print("🚀 New Relic Alert Poller - Starting")
@@ -126,17 +211,48 @@ def start_polling_server(
     print("="*60)
     print()
 
-    # Create poller
+    # Create poller and worker pool
     poller = create_poller()
 
-    # Start polling loop
-    for incident in poller.poll_continuously(
-        interval_seconds=poll_interval,
-        condition_pattern=condition_pattern
-    ):
-        # Process each detected incident
+    def handle_incident(incident: dict):
+        # Incidents are only marked as processed once a worker takes them; one
+        # dropped by a full queue is handed back to the poller (on_drop) and
+        # re-offered on the next poll
+        if not poller.claim_incident(incident.get("incidentId")):
+            return
         process_incident(incident)
 
+    pool = create_worker_pool(
+        handle_incident,
+        num_workers=workers,
+        queue_size=queue_size,
+        overflow_policy=overflow_policy,
+        on_drop=poller.release_incident
+    )
+    pool.start()
+    print(f"👷 Started {pool.num_workers} worker(s), queue size {pool.queue.maxsize} ({pool.queue.overflow_policy})")
+
+    try:
+        # Start polling loop - only enqueue here, workers do the processing
+        for incident in poller.poll_continuously(
+            interval_seconds=poll_interval,
+            condition_pattern=condition_pattern,
+            adaptive=adaptive,
+            mark_processed=False
+        ):
+            if pool.submit(incident):
+                print(f"📥 Queued incident {incident.get('incidentId')} [{incident.get('priority')}] - queue depth {pool.queue.qsize()}")
+            else:
+                print(f"⚠️  Work queue full - dropped incident {incident.get('incidentId')} (retried on a later poll)")
+    finally:
+        print("⏳ Waiting for in-flight incidents to finish...")
+        pool.stop()
+        print(f"📊 Queue stats: {pool.queue.stats}")
+        if hasattr(pool.queue, "metrics"):
+            for priority, metrics in pool.queue.metrics().items():
+                if metrics["dequeued"] or metrics["depth"]:
+                    print(f"   {priority}: {metrics}")
+
 
 if __name__ == "__main__":
     import argparse
@@ -161,6 +277,30 @@ if __name__ == "__main__":
         action="store_true",
         help="Process all incidents (no condition filter)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of incident processing workers (default: WORKER_COUNT or 2)"
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=None,
+        help="Maximum queued incidents (default: WORKER_QUEUE_SIZE or 100)"
+    )
+    parser.add_argument(
+        "--overflow-policy",
+        choices=OVERFLOW_POLICIES,
+        default=None,
+        help="What to do when the queue is full (default: WORKER_OVERFLOW_POLICY or drop_oldest)"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        default=None,
+        help="Poll faster while incidents arrive and back off while quiet (default: POLL_ADAPTIVE)"
+    )
 
     args = parser.parse_args()
 
@@ -168,6 +308,10 @@ if __name__ == "__main__":
 
     start_polling_server(
         poll_interval=args.interval,
-        condition_pattern=condition_filter
+        condition_pattern=condition_filter,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        overflow_policy=args.overflow_policy,
+        adaptive=args.adaptive
     )
 
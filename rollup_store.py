@@ -0,0 +1,202 @@
+"""
+Incremental hourly rollups for the 7-day NRQL aggregates.
+
+Instead of re-running ``SINCE 7 days ago`` FACET queries from scratch, each
+run asks NRQL only for the hours since the last stored bucket (plus a short
+overlap for late-arriving data) with ``TIMESERIES 1 hour``, stores the hourly
+buckets per facet in SQLite, and builds the 7-day view by summing buckets
+locally.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from config import Config
+from nrql_executor import fill_time_range
+
+
+HOUR = 3600
+
+
+class RollupStore:
+    """SQLite store of hourly facet counts per named series."""
+
+    def __init__(self, path: str, window_hours: int = 168, overlap_hours: int = 2):
+        """
+        Args:
+            path: SQLite database file
+            window_hours: Length of the rolled-up view in hours (168 = 7 days)
+            overlap_hours: Hours re-fetched before the last stored bucket
+        """
+        self.window_hours = window_hours
+        self.overlap_hours = overlap_hours
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rollup_buckets ("
+            "series TEXT NOT NULL, facet TEXT NOT NULL, hour INTEGER NOT NULL, count REAL NOT NULL, "
+            "PRIMARY KEY (series, facet, hour))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rollup_state (series TEXT PRIMARY KEY, last_hour INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _hour(timestamp: float) -> int:
+        return int(timestamp // HOUR) * HOUR
+
+    def last_hour(self, series: str) -> Optional[int]:
+        """Start (epoch seconds) of the newest stored bucket for a series, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_hour FROM rollup_state WHERE series = ?", (series,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def plan(self, series: str, template: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Work out which hours a series is missing and the NRQL that fetches them.
+
+        The end of the range is truncated to the minute, so two plans made in
+        the same minute produce the same query (and can share one execution).
+
+        Args:
+            series: Rollup series name
+            template: NRQL with a ``{time_range}`` placeholder and ``TIMESERIES 1 hour``
+            now: Current epoch seconds (default: time.time())
+
+        Returns:
+            {"series", "template", "query", "start", "end"} with start/end in epoch seconds
+        """
+        now = time.time() if now is None else now
+        end = int(now // 60) * 60
+        window_start = self._hour(now) - (self.window_hours - 1) * HOUR
+
+        last_hour = self.last_hour(series)
+        if last_hour is None or last_hour < window_start:
+            start = window_start
+        else:
+            start = max(window_start, last_hour - self.overlap_hours * HOUR)
+
+        return {
+            "series": series,
+            "template": template,
+            "query": fill_time_range(template, start, end),
+            "start": start,
+            "end": end
+        }
+
+    def apply(self, plan: Dict[str, Any], results: Iterable[Dict[str, Any]]):
+        """
+        Store the hourly buckets returned for a plan.
+
+        Buckets in the planned range are replaced (not added to), so the
+        overlap re-fetch never double counts.
+
+        Args:
+            plan: Plan returned by plan()
+            results: NRQL FACET ... TIMESERIES rows
+        """
+        rows = []
+        for row in results:
+            begin = row.get("beginTimeSeconds")
+            if begin is None:
+                continue
+            facet = row.get("facet")
+            if not isinstance(facet, list):
+                facet = [facet]
+            rows.append((plan["series"], json.dumps(facet), self._hour(begin), row.get("count", 0) or 0))
+
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM rollup_buckets WHERE series = ? AND hour >= ? AND hour < ?",
+                (plan["series"], self._hour(plan["start"]), plan["end"])
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rollup_buckets (series, facet, hour, count) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rollup_state (series, last_hour) VALUES (?, ?)",
+                (plan["series"], self._hour(plan["end"]))
+            )
+            # Buckets that fell out of the window are never read again
+            self._conn.execute(
+                "DELETE FROM rollup_buckets WHERE series = ? AND hour < ?",
+                (plan["series"], self._hour(plan["end"]) - self.window_hours * HOUR)
+            )
+            self._conn.commit()
+
+    def window(self, series: str, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Merge stored buckets into the rolled-up view.
+
+        Args:
+            series: Rollup series name
+            now: Current epoch seconds (default: time.time())
+
+        Returns:
+            Rows shaped like a plain FACET query result: {"facet": [...], "count": n}
+        """
+        now = time.time() if now is None else now
+        window_start = self._hour(now) - (self.window_hours - 1) * HOUR
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT facet, SUM(count) FROM rollup_buckets WHERE series = ? AND hour >= ? GROUP BY facet",
+                (series, window_start)
+            ).fetchall()
+        return [
+            {"facet": json.loads(facet), "count": int(count) if float(count).is_integer() else count}
+            for facet, count in rows
+        ]
+
+
+_store: Optional[RollupStore] = None
+_store_lock = threading.Lock()
+
+
+def get_rollup_store() -> RollupStore:
+    """Get the process-wide rollup store configured by ROLLUP_* settings."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RollupStore(
+                    path=os.path.join(Config.STATE_DIR, "rollups.db"),
+                    window_hours=Config.ROLLUP_WINDOW_HOURS,
+                    overlap_hours=Config.ROLLUP_OVERLAP_HOURS
+                )
+    return _store
+
+
+def fetch_rollup(series: str, template: str, executor, long_running: bool = False) -> List[Dict[str, Any]]:
+    """
+    Bring a series up to date and return its rolled-up view.
+
+    Args:
+        series: Rollup series name
+        template: NRQL template (see RollupStore.plan)
+        executor: NrqlExecutor used to run the incremental query
+        long_running: Run the query in async NRQL mode (see NrqlExecutor.submit)
+
+    Returns:
+        Rolled-up FACET rows (see RollupStore.window)
+    """
+    store = get_rollup_store()
+    plan = store.plan(series, template)
+    # Split on hour boundaries if the increment has more facets than LIMIT
+    results = executor.run_complete(
+        template, plan["start"], plan["end"], align=HOUR, long_running=long_running
+    )
+    store.apply(plan, results)
+    return store.window(series)
+
+
+def prefetch_rollup(series: str, template: str, executor, long_running: bool = False):
+    """Start the incremental query for a series so a later fetch_rollup can reuse it."""
+    executor.submit(get_rollup_store().plan(series, template)["query"], long_running=long_running)
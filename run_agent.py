@@ -2,6 +2,7 @@
 """Run the New Relic Alert Agent analysis."""
 from agent_graph import create_agent_graph
 from agent_state import AgentState
+from run_budget import start_deadline
 
 def run_analysis():
     """Start the agent analysis workflow."""
@@ -22,6 +23,7 @@ def run_analysis():
         "key_insights": None,
         "slack_sent": False,
         "errors": [],
+        "deadline": start_deadline(),
         "current_step": "start",
         "next_step": None
     }
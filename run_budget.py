@@ -0,0 +1,104 @@
+"""
+Per-run deadline budget.
+
+Every run carries an absolute deadline in ``AgentState["deadline"]`` (epoch
+seconds, set from TIME_TO_NOTIFY_SLO_SECONDS when the run starts). Nodes ask
+how much time is left before the Slack notification must go out and trim
+their work accordingly: fewer conditions, cached or rule-based insights
+instead of LLM calls, skipped enrichment. Blocking work can be bounded with
+run_within_budget so a slow NerdGraph or WatsonX call cannot hold up the
+notification.
+"""
+import math
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+from config import Config
+
+
+def start_deadline(slo_seconds: Optional[float] = None) -> float:
+    """
+    Deadline for a run starting now.
+
+    Args:
+        slo_seconds: Time-to-notify budget (default: Config.TIME_TO_NOTIFY_SLO_SECONDS)
+
+    Returns:
+        Deadline in epoch seconds
+    """
+    slo_seconds = Config.TIME_TO_NOTIFY_SLO_SECONDS if slo_seconds is None else slo_seconds
+    return time.time() + slo_seconds
+
+
+def ensure_deadline(state: Dict[str, Any]) -> float:
+    """Set the run deadline if the caller did not (e.g. runs started by ``langgraph dev``)."""
+    if not state.get("deadline"):
+        state["deadline"] = start_deadline()
+    return state["deadline"]
+
+
+def time_left(state: Dict[str, Any]) -> float:
+    """
+    Seconds of work left before the notification must be sent.
+
+    The NOTIFY_RESERVE_SECONDS needed to send the notification itself are
+    already subtracted. Returns infinity for runs without a deadline.
+    """
+    deadline = state.get("deadline")
+    if not deadline:
+        return math.inf
+    return deadline - time.time() - Config.NOTIFY_RESERVE_SECONDS
+
+
+def has_budget(state: Dict[str, Any], seconds: float) -> bool:
+    """Whether at least ``seconds`` of work time are left."""
+    return time_left(state) >= seconds
+
+
+class BudgetExceeded(Exception):
+    """Raised by run_within_budget when the run deadline passes first."""
+
+
+def run_within_budget(state: Dict[str, Any], fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run ``fn(*args, **kwargs)`` but stop waiting when the run budget is spent.
+
+    The call runs on its own daemon thread. It cannot be interrupted: if the
+    budget runs out it keeps going in the background (its result, e.g. a
+    cache fill, is not lost) while the caller degrades. Because no pool is
+    shared, calls abandoned by one run never hold up another run's calls;
+    they end on their own HTTP/LLM timeouts.
+
+    Raises:
+        BudgetExceeded: If the budget ran out before fn returned
+    """
+    remaining = time_left(state)
+    if remaining == math.inf:
+        return fn(*args, **kwargs)
+    if remaining <= 0:
+        raise BudgetExceeded("Run deadline already passed")
+
+    outcome: Dict[str, Any] = {}
+
+    def target():
+        try:
+            outcome["result"] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, name="budget-call", daemon=True)
+    thread.start()
+    thread.join(remaining)
+    if thread.is_alive():
+        raise BudgetExceeded(f"Run deadline reached after waiting {remaining:.0f}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def monotonic_deadline(state: Dict[str, Any]) -> Optional[float]:
+    """The end of the work budget as a ``time.monotonic()`` value (None without a deadline)."""
+    remaining = time_left(state)
+    if remaining == math.inf:
+        return None
+    return time.monotonic() + max(0.0, remaining)
@@ -5,6 +5,7 @@ Fetches open incidents from New Relic, summarizes them with AI, and sends to Sla
 """
 from agent_graph import create_agent_graph
 from agent_state import AgentState
+from run_budget import start_deadline
 
 
 def main():
@@ -25,6 +26,7 @@ def main():
         "key_insights": None,
         "slack_sent": False,
         "errors": [],
+        "deadline": start_deadline(),
         "current_step": "init",
         "next_step": None
     }
@@ -0,0 +1,186 @@
+"""
+Single-pass parser for sectioned LLM output.
+
+The incident summary prompt asks for ``SUMMARY:`` / ``INFRASTRUCTURE:`` /
+``APPLICATION:`` / ``PRIORITY ACTIONS:`` sections. SectionParser reads the
+response once, line by line, either all at once or chunk by chunk as tokens
+stream in, and reports each section as soon as the next heading (or the end
+of the text) completes it. Headings are matched leniently: case, markdown
+markers (``#``, ``**``), numbering (``2.``) and trailing colons are accepted.
+Aliases such as ``EXECUTIVE SUMMARY`` only count as headings on a line of
+their own, so a content line like ``2. Actions: check logs`` is not mistaken
+for one. A heading that appears again continues its section.
+
+A parser may be fed from a worker thread while another thread gives up on
+it: stop() makes later feed() calls no-ops and returns a copy of the
+sections finished so far.
+"""
+import re
+import copy
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+_HEADING_MARKUP = re.compile(r"^[#>\s]*(?:\*\*|__)?\s*(?:\d+[.)]\s*)?")
+_BULLET = re.compile(r"^\s*(?:[-•*]|\d+[.)])\s+")
+
+
+def _normalize_heading(text: str) -> str:
+    text = text.replace("*", "").replace("_", " ")
+    return re.sub(r"\s+", " ", text).strip().strip(":").strip().lower()
+
+
+class SectionParser:
+    """Incremental state machine that splits text into named sections."""
+
+    def __init__(
+        self,
+        headings: Dict[str, Iterable[str]],
+        on_section: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """
+        Args:
+            headings: Canonical section name -> accepted heading spellings
+                (matched case-insensitively; the canonical name is always accepted)
+            on_section: Called with each section as soon as it is complete
+        """
+        self._aliases = {}  # normalized spelling -> (section name, is canonical)
+        for name, aliases in headings.items():
+            for alias in aliases:
+                self._aliases[_normalize_heading(alias)] = (name, False)
+        for name in headings:
+            self._aliases[_normalize_heading(name)] = (name, True)
+
+        self.on_section = on_section
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        self._current: Optional[Dict[str, Any]] = None
+        self._buffer = ""
+        self._closed = False
+        self._stopped = False
+        self._lock = threading.RLock()
+
+    def _match_heading(self, line: str):
+        """Return (section name, text after the heading) if the line is a heading."""
+        stripped = _HEADING_MARKUP.sub("", line)
+        head, colon, rest = stripped.partition(":")
+        match = self._aliases.get(_normalize_heading(head))
+        if match is None:
+            return None
+        name, canonical = match
+        rest = rest.strip().strip("*").strip() if colon else ""
+        # Only the canonical name may carry inline text ("SUMMARY: ...")
+        if rest and not canonical:
+            return None
+        return name, rest
+
+    def _finish_current(self, completed: List[Dict[str, Any]]):
+        section = self._current
+        if section is None:
+            return
+        section["text"] = "\n".join(section.pop("_lines")).strip()
+        self.sections[section["name"]] = section
+        self._current = None
+        completed.append(section)
+        if self.on_section is not None:
+            self.on_section(section)
+
+    def _add_line(self, line: str, completed: List[Dict[str, Any]]):
+        heading = self._match_heading(line)
+        if heading is not None:
+            self._finish_current(completed)
+            name, rest = heading
+            previous = self.sections.get(name)
+            if previous is not None:
+                # Repeated heading - keep extending the earlier section
+                previous["_lines"] = [previous["text"]] if previous["text"] else []
+                self._current = previous
+            else:
+                self._current = {"name": name, "text": "", "items": [], "_lines": []}
+            line = rest
+            if not line:
+                return
+
+        if self._current is None:
+            return  # preamble before the first heading
+
+        if not line.strip():
+            return
+        self._current["_lines"].append(line.strip())
+        if _BULLET.match(line):
+            item = _BULLET.sub("", line, count=1).strip()
+            if item:
+                self._current["items"].append(item)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume more text.
+
+        Args:
+            chunk: Next piece of the response (any size, may split lines)
+
+        Returns:
+            Sections completed by this chunk
+        """
+        with self._lock:
+            if self._stopped:
+                return []
+            if self._closed:
+                raise ValueError("SectionParser is closed")
+            completed: List[Dict[str, Any]] = []
+            self._buffer += chunk
+            *lines, self._buffer = self._buffer.split("\n")
+            for line in lines:
+                self._add_line(line, completed)
+            return completed
+
+    @property
+    def stopped(self) -> bool:
+        """Whether stop() has been called (feeders can quit early)."""
+        return self._stopped
+
+    def stop(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Stop accepting text and return the sections finished so far.
+
+        Returns:
+            Deep copy of the finished sections: {name: {"name", "text", "items"}}
+        """
+        with self._lock:
+            self._stopped = True
+            return {
+                name: {key: copy.deepcopy(value) for key, value in section.items() if key != "_lines"}
+                for name, section in self.sections.items()
+            }
+
+    def close(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Finish parsing (flushes the last line and section).
+
+        Returns:
+            All sections: {name: {"name", "text", "items"}}
+        """
+        with self._lock:
+            if not self._closed:
+                completed: List[Dict[str, Any]] = []
+                if self._buffer:
+                    self._add_line(self._buffer, completed)
+                    self._buffer = ""
+                self._finish_current(completed)
+                self._closed = True
+            return self.sections
+
+
+def parse_sections(text: str, headings: Dict[str, Iterable[str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse complete text in one call.
+
+    Args:
+        text: Sectioned text
+        headings: See SectionParser
+
+    Returns:
+        All sections (see SectionParser.close)
+    """
+    parser = SectionParser(headings)
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,242 @@
+"""
+Bounded, persistent store of incident IDs the poller has already processed.
+
+Replaces the ever-growing in-memory ``processed_incidents`` set:
+- MemorySeenStore: LRU + TTL bounded dict, lost on restart
+- SqliteSeenStore: SQLite-backed store with an in-memory LRU hot tier and an
+  optional Bloom filter in front, so restarts are warm and the common
+  "never seen this ID" lookup never touches disk
+"""
+import os
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, Optional
+from config import Config
+
+
+class SeenStore(ABC):
+    """Interface for a set-like store of processed incident IDs."""
+
+    @abstractmethod
+    def __contains__(self, key) -> bool:
+        """Whether the ID has been seen (and has not expired)."""
+
+    @abstractmethod
+    def add(self, key):
+        """Record the ID as seen now."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored IDs."""
+
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class MemorySeenStore(SeenStore):
+    """In-memory seen store with LRU eviction and TTL expiry."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            max_entries: Maximum number of IDs kept (least recently used evicted first)
+            ttl_seconds: Forget IDs older than this (default: never expire)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> first seen (epoch seconds)
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            seen_at = self._entries.get(key)
+            if seen_at is None:
+                return False
+            if self.ttl_seconds and time.time() - seen_at > self.ttl_seconds:
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key, seen_at: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = seen_at if seen_at is not None else time.time()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter used as a negative-lookup front tier."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: Expected number of items
+            error_rate: Target false-positive rate at capacity
+        """
+        self.capacity = max(1, capacity)
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key) -> Iterable[int]:
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SqliteSeenStore(SeenStore):
+    """
+    SQLite-backed seen store with TTL and size-bounded eviction.
+
+    Lookups go hot LRU tier -> Bloom filter (definite misses) -> SQLite.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: Optional[float] = None,
+        max_entries: int = 100000,
+        memory_entries: int = 10000,
+        use_bloom: bool = True
+    ):
+        """
+        Args:
+            path: SQLite database file
+            ttl_seconds: Forget IDs older than this (default: never expire)
+            max_entries: Maximum number of IDs kept on disk
+            memory_entries: Size of the in-memory hot tier
+            use_bloom: Put a Bloom filter in front of SQLite for negative lookups
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hot = MemorySeenStore(max_entries=memory_entries, ttl_seconds=ttl_seconds)
+        self.use_bloom = use_bloom
+        self.bloom = None
+        self._adds_since_prune = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_incidents ("
+            "incident_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_at ON seen_incidents(seen_at)")
+        self._conn.commit()
+
+        self._prune()
+        self._warm()
+
+    def _warm(self):
+        """Load recent IDs into the hot tier and rebuild the Bloom filter."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT incident_id, seen_at FROM seen_incidents ORDER BY seen_at"
+            ).fetchall()
+            if self.use_bloom:
+                self.bloom = BloomFilter(capacity=max(self.max_entries, len(rows)))
+                for incident_id, _ in rows:
+                    self.bloom.add(incident_id)
+        for incident_id, seen_at in rows[-self.hot.max_entries:]:
+            self.hot.add(incident_id, seen_at=seen_at)
+
+    def _prune(self):
+        """Drop expired IDs and trim the table to max_entries."""
+        with self._lock:
+            if self.ttl_seconds:
+                self._conn.execute(
+                    "DELETE FROM seen_incidents WHERE seen_at < ?",
+                    (time.time() - self.ttl_seconds,)
+                )
+            self._conn.execute(
+                "DELETE FROM seen_incidents WHERE incident_id NOT IN ("
+                "SELECT incident_id FROM seen_incidents ORDER BY seen_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def __contains__(self, key) -> bool:
+        key = str(key)
+        if key in self.hot:
+            return True
+        if self.bloom is not None and key not in self.bloom:
+            return False
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT seen_at FROM seen_incidents WHERE incident_id = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return False
+        if self.ttl_seconds and time.time() - row[0] > self.ttl_seconds:
+            return False
+
+        self.hot.add(key, seen_at=row[0])
+        return True
+
+    def add(self, key):
+        key = str(key)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO seen_incidents (incident_id, seen_at) VALUES (?, ?)",
+                (key, now)
+            )
+            self._conn.commit()
+        self.hot.add(key, seen_at=now)
+        if self.bloom is not None:
+            self.bloom.add(key)
+
+        self._adds_since_prune += 1
+        if self._adds_since_prune >= max(1, self.max_entries // 10):
+            self._adds_since_prune = 0
+            self._prune()
+            # Evicted IDs linger in the Bloom filter as false positives; rebuild it
+            if self.bloom is not None and self.bloom.count > self.bloom.capacity:
+                self._warm()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen_incidents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_seen_store() -> SeenStore:
+    """Create the seen-incident store configured by SEEN_STORE_* settings."""
+    ttl_seconds = Config.SEEN_STORE_TTL_SECONDS or None
+
+    if Config.SEEN_STORE_BACKEND == "memory":
+        return MemorySeenStore(max_entries=Config.SEEN_STORE_MAX_ENTRIES, ttl_seconds=ttl_seconds)
+
+    return SqliteSeenStore(
+        path=os.path.join(Config.STATE_DIR, "seen_incidents.db"),
+        ttl_seconds=ttl_seconds,
+        max_entries=Config.SEEN_STORE_MAX_ENTRIES,
+        memory_entries=Config.SEEN_STORE_MEMORY_ENTRIES,
+        use_bloom=Config.SEEN_STORE_BLOOM
+    )
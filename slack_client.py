@@ -2,6 +2,7 @@
 import requests
 from typing import Dict, List, Any
 from config import Config
+from http_transport import get_transport
 
 
 class SlackClient:
@@ -115,10 +116,10 @@ class SlackClient:
         try:
             message = self.format_alert_message(alert_data, actions)
 
-            response = requests.post(
+            response = get_transport().post(
                 self.webhook_url,
-                json=message,
-                timeout=10
+                json_body=message,
+                timeout=Config.SLACK_TIMEOUT_SECONDS
             )
             response.raise_for_status()
 
@@ -156,10 +157,10 @@ class SlackClient:
         try:
             message = {"blocks": blocks}
 
-            response = requests.post(
+            response = get_transport().post(
                 self.webhook_url,
-                json=message,
-                timeout=10
+                json_body=message,
+                timeout=Config.SLACK_TIMEOUT_SECONDS
             )
             response.raise_for_status()
 
@@ -0,0 +1,145 @@
+"""
+One structured LLM request for the insights of several conditions.
+
+Instead of one free-text generation per condition, all conditions are sent
+in a single prompt that asks for a JSON object keyed by conditionId. The
+response is validated against INSIGHTS_SCHEMA: a JSON object with exactly
+one non-empty string per requested conditionId. Entries that violate it are
+rejected, and the conditions they belong to are left for the caller to
+generate individually.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Shape the response must have: {"<conditionId>": "<insight>", ...}; the
+# property names are the requested conditionIds (see insights_schema)
+INSIGHTS_SCHEMA = {
+    "type": "object",
+    "additionalProperties": {"type": "string", "minLength": 1}
+}
+
+_JSON_TYPES = {"object": dict, "string": str}
+
+
+def insights_schema(expected_ids: List[str]) -> Dict[str, Any]:
+    """INSIGHTS_SCHEMA narrowed to the conditionIds of one request."""
+    entry = INSIGHTS_SCHEMA["additionalProperties"]
+    return {
+        "type": INSIGHTS_SCHEMA["type"],
+        "properties": {condition_id: entry for condition_id in expected_ids},
+        "required": list(expected_ids),
+        "additionalProperties": False
+    }
+
+
+def _type_errors(value: Any, schema: Dict[str, Any]) -> List[str]:
+    """Check the type and minLength keywords of a schema."""
+    expected = _JSON_TYPES[schema["type"]]
+    if not isinstance(value, expected):
+        return [f"expected {schema['type']}, got {type(value).__name__}"]
+    if "minLength" in schema and len(value.strip()) < schema["minLength"]:
+        return [f"shorter than {schema['minLength']} characters"]
+    return []
+
+
+def schema_errors(data: Any, expected_ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Validate a decoded response against insights_schema(expected_ids).
+
+    Args:
+        data: Decoded response
+        expected_ids: conditionIds that were asked for
+
+    Returns:
+        {conditionId or "$": violations}; empty if the response is valid
+    """
+    schema = insights_schema(expected_ids)
+    errors = _type_errors(data, schema)
+    if errors:
+        return {"$": errors}
+
+    problems: Dict[str, List[str]] = {}
+    unexpected = sorted(set(data) - set(schema["properties"]))
+    if unexpected:
+        problems["$"] = [f"unexpected conditionIds: {', '.join(unexpected)}"]
+    for condition_id in schema["required"]:
+        if condition_id not in data:
+            problems[condition_id] = ["missing"]
+            continue
+        errors = _type_errors(data[condition_id], schema["properties"][condition_id])
+        if errors:
+            problems[condition_id] = errors
+    return problems
+
+
+def build_structured_prompt(sections: List[Tuple[str, str, str]]) -> str:
+    """
+    Build the multi-condition prompt.
+
+    Args:
+        sections: (condition_id, condition_name, alert data text) per condition
+
+    Returns:
+        Prompt asking for one JSON object keyed by conditionId
+    """
+    blocks = "\n\n".join(
+        f'### conditionId {condition_id}: "{condition_name}"\n{context}'
+        for condition_id, condition_name, context in sections
+    )
+    example = json.dumps({condition_id: "..." for condition_id, _, _ in sections[:2]})
+    return f"""Analyze the recent alerts of these {len(sections)} New Relic alert conditions.
+
+{blocks}
+
+For EACH condition write a concise 3-4 sentence analysis covering:
+1. Pattern observed (frequency, severity trends)
+2. Root cause or key issue identified
+3. Impact assessment
+4. Actionable recommendation
+
+Keep it professional and actionable for DevOps engineers.
+
+Respond with ONLY a JSON object mapping each conditionId (as a string) to its analysis text, for example:
+{example}"""
+
+
+def extract_json_object(text: str) -> Optional[Any]:
+    """
+    Decode the outermost JSON object in an LLM response.
+
+    Tolerates prose or code fences around the object.
+
+    Returns:
+        The decoded value, or None if no JSON object could be decoded
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+
+def validate_insights(data: Any, expected_ids: List[str]) -> Dict[str, str]:
+    """
+    Keep the entries of a decoded response that satisfy the schema.
+
+    Args:
+        data: Decoded response
+        expected_ids: conditionIds that were asked for
+
+    Returns:
+        {conditionId: insight} for every expected ID whose entry is valid;
+        nothing is accepted if the response is not an object (see schema_errors)
+    """
+    problems = schema_errors(data, expected_ids)
+    if "$" in problems and not isinstance(data, dict):
+        return {}
+    return {
+        condition_id: data[condition_id].strip()
+        for condition_id in expected_ids
+        if condition_id not in problems
+    }